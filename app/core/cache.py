@@ -0,0 +1,94 @@
+"""
+Bounded in-process LRU cache with per-entry TTL.
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    Least-recently-used cache capped by entry count, with expiry.
+    
+    Entries are evicted oldest-first once max_entries is reached, and treated
+    as missing once older than ttl_seconds. All operations are O(1) and
+    synchronous, so they are safe to call from coroutines without a lock.
+    """
+    
+    def __init__(self, max_entries: int = 256, ttl_seconds: Optional[float] = 3600):
+        """
+        Initialize the cache.
+        
+        Args:
+            max_entries: Maximum number of entries kept
+            ttl_seconds: Entry lifetime in seconds (None for no expiry)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get a cached value and mark it as recently used.
+        
+        Args:
+            key: Cache key
+            default: Value returned on a miss or expired entry
+        
+        Returns:
+            Cached value or default
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        
+        stored_at, value = entry
+        if self.ttl_seconds is not None and time.monotonic() - stored_at > self.ttl_seconds:
+            del self._data[key]
+            return default
+        
+        self._data.move_to_end(key)
+        return value
+    
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Store a value, evicting the least recently used entries if full.
+        
+        Args:
+            key: Cache key
+            value: Value to cache
+        """
+        if key in self._data:
+            self._data.move_to_end(key)
+        self._data[key] = (time.monotonic(), value)
+        
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+    
+    def purge_expired(self) -> int:
+        """
+        Drop all expired entries.
+        
+        Returns:
+            Number of entries removed
+        """
+        if self.ttl_seconds is None:
+            return 0
+        
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired = [key for key, (stored_at, _) in self._data.items() if stored_at < cutoff]
+        for key in expired:
+            del self._data[key]
+        return len(expired)
+    
+    def clear(self) -> None:
+        """Remove all entries."""
+        self._data.clear()
+    
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+    
+    def __len__(self) -> int:
+        return len(self._data)
@@ -2,7 +2,7 @@
 Core configuration for the FastAPI Speech Translation application.
 """
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
@@ -18,6 +18,10 @@ class Settings(BaseSettings):
     APP_NAME: str = "Speech Translation API"
     APP_VERSION: str = "1.0.0"
     DEBUG: bool = False
+    WEB_CONCURRENCY: int = 1  # Uvicorn worker processes
+    # Browser origins allowed to call the API; set the frontend origin(s) in
+    # production. "*" is opt-in and disables credentialed requests
+    CORS_ORIGINS: List[str] = ["http://localhost:3000"]
     
     # API Keys
     DEEPGRAM_API_KEY: str = "mock-deepgram-key"
@@ -29,23 +33,49 @@ class Settings(BaseSettings):
     DEEPL_API_URL: str = "https://api-free.deepl.com/v2/translate"
     ELEVENLABS_API_URL: str = "https://api.elevenlabs.io/v1"
     
+    # Shared HTTP connection pool for upstream APIs
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_MAX_RETRIES: int = 3  # Attempts per DeepL/ElevenLabs call on 429/5xx
+    
+    # Upstream concurrency limits (match provider plan limits to avoid 429s)
+    STT_CONCURRENCY: int = 10
+    TTS_CONCURRENCY: int = 5
+    
     # Redis Configuration
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
     REDIS_PASSWORD: Optional[str] = None
     REDIS_CACHE_TTL: int = 3600
+    REDIS_MAX_CONNECTIONS: int = 64
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = 1.0  # Seconds; an unreachable Redis fails fast
+    REDIS_SOCKET_TIMEOUT: float = 2.0
     
     # Audio Processing
     MAX_AUDIO_SIZE_MB: int = 25
     SUPPORTED_AUDIO_FORMATS: list = [".mp3", ".wav", ".m4a", ".flac", ".ogg", ".webm"]
     
+    # In-process pipeline and translation result caches
+    PIPELINE_CACHE_MAX_ENTRIES: int = 256
+    PIPELINE_CACHE_TTL: int = 3600  # Seconds
+    TRANSLATION_CACHE_MAX_ENTRIES: int = 1024  # Translated phrases kept in memory
+    TRANSLATION_CACHE_TTL: int = 3600  # Seconds
+    
     # ElevenLabs Configuration
     ELEVENLABS_VOICE_ID: str = "pNInz6obpgDQGcFmaJgB"  # Adam (Male)
-    ELEVENLABS_MODEL_ID: str = "eleven_multilingual_v2"
+    ELEVENLABS_MODEL_ID: str = "eleven_turbo_v2_5"  # Lowest-latency multilingual model
+    TTS_CACHE_MAX_ENTRIES: int = 256  # Synthesized clips kept in memory
+    TTS_CACHE_TTL: int = 3600
+    TTS_CHUNK_MAX_CHARS: int = 1500  # Longer text is synthesized as concurrent chunks
     
     # OpenSmile Configuration
     OPENSMILE_CONFIG: str = "eGeMAPSv02"  # Extended Geneva Minimalistic Acoustic Parameter Set
+    EMOTION_CONCURRENCY: Optional[int] = None  # Concurrent extractions (default: half the cores)
+    EMOTION_CACHE_MAX_ENTRIES: int = 512  # Results kept per distinct audio content
+    EMOTION_CACHE_TTL: int = 3600
+    EMOTION_REDIS_TTL: int = 604800  # Results persisted in Redis across restarts (7 days)
+    EMOTION_BATCH_MAX_FILES: int = 16  # Clips accepted per /api/emotion/detect-batch request
     
     # Logging
     LOG_LEVEL: str = "INFO"
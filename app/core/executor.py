@@ -0,0 +1,50 @@
+"""
+Dedicated thread pool for CPU-bound work called from async code.
+"""
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Separate from the loop's default executor, which Starlette uses for sync
+# handlers and upload file I/O, so heavy CPU work can't starve either side.
+# Created on first use so a restarted app (e.g. in tests) gets a fresh pool.
+_cpu_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Get or create the CPU thread pool."""
+    global _cpu_executor
+    if _cpu_executor is None:
+        _cpu_executor = ThreadPoolExecutor(
+            max_workers=min(32, (os.cpu_count() or 1) * 4),
+            thread_name_prefix="cpu-worker",
+        )
+    return _cpu_executor
+
+
+async def run_cpu_bound(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a blocking, CPU-bound callable on the dedicated thread pool.
+    
+    Args:
+        func: Callable to run
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+    
+    Returns:
+        Return value of func
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown_executor():
+    """Stop the CPU pool, letting queued work finish in the background."""
+    global _cpu_executor
+    if _cpu_executor is not None:
+        _cpu_executor.shutdown(wait=False)
+        _cpu_executor = None
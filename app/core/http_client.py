@@ -0,0 +1,117 @@
+"""
+Shared HTTP client for the upstream speech, translation and voice APIs.
+"""
+import asyncio
+import httpx
+import logging
+from typing import Any, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Rate limits and gateway hiccups usually clear within a second or two
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+_MAX_RETRY_DELAY = 10.0
+
+
+class HTTPClient:
+    """Lazily created httpx client shared by all service modules."""
+    
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    def get_client(self) -> httpx.AsyncClient:
+        """
+        Get or create the shared HTTP client.
+        
+        One pool serves Deepgram, DeepL and ElevenLabs, so warm TLS sessions
+        and HTTP/2 connections are reused across services and requests.
+        Services needing a longer timeout pass it per request.
+        
+        Returns:
+            Shared AsyncClient instance
+        """
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(30.0, connect=5.0),
+                limits=httpx.Limits(
+                    max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                    max_connections=settings.HTTP_MAX_CONNECTIONS,
+                ),
+                http2=True,
+            )
+        return self._client
+    
+    async def close(self):
+        """Close the shared client and its connection pool."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            logger.info("HTTP client closed")
+
+
+def retry_delay(response: httpx.Response, attempt: int) -> Optional[float]:
+    """
+    Get the backoff before retrying a failed upstream response.
+    
+    Honors a numeric Retry-After header, otherwise backs off exponentially
+    (0.5s, 1s, 2s, ...), capped so a bad header can't stall a request.
+    
+    Args:
+        response: Upstream response
+        attempt: Zero-based attempt number that produced the response
+    
+    Returns:
+        Seconds to wait, or None if the response should not be retried
+    """
+    if response.status_code not in RETRYABLE_STATUS_CODES or attempt >= settings.HTTP_MAX_RETRIES - 1:
+        return None
+    try:
+        delay = float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        delay = 0.5 * 2 ** attempt
+    return min(max(delay, 0.0), _MAX_RETRY_DELAY)
+
+
+async def post_with_retry(
+    client: httpx.AsyncClient,
+    url: str,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    **kwargs: Any,
+) -> httpx.Response:
+    """
+    POST to an upstream API, retrying rate limits and transient 5xx errors.
+    
+    Args:
+        client: HTTP client to send with
+        url: Request URL
+        semaphore: Concurrency limit held per attempt, never across backoff
+        **kwargs: Arguments for client.post
+    
+    Returns:
+        Successful response
+    
+    Raises:
+        httpx.HTTPStatusError: If the last attempt still fails
+    """
+    attempt = 0
+    while True:
+        if semaphore is None:
+            response = await client.post(url, **kwargs)
+        else:
+            async with semaphore:
+                response = await client.post(url, **kwargs)
+        delay = retry_delay(response, attempt) if response.is_error else None
+        if delay is None:
+            response.raise_for_status()
+            return response
+        logger.warning(
+            "Upstream returned %d, retrying in %.1fs (attempt %d/%d)",
+            response.status_code, delay, attempt + 2, settings.HTTP_MAX_RETRIES,
+        )
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+# Global HTTP client instance
+http_client = HTTPClient()
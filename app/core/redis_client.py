@@ -2,33 +2,57 @@
 Redis client for caching audio files and intermediate results.
 """
 import redis.asyncio as redis
-from typing import Optional
+from typing import Any, Optional, Union
 import logging
+import orjson
 from app.core.config import settings
 
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
 logger = logging.getLogger(__name__)
 
+# Every LZ4 frame starts with this magic number, so compressed and raw
+# entries can coexist under the same keys
+_LZ4_FRAME_MAGIC = b"\x04\x22\x4d\x18"
+
 
 class RedisClient:
     """Async Redis client wrapper for caching operations."""
     
     def __init__(self):
         self.redis: Optional[redis.Redis] = None
+        self._pool: Optional[redis.ConnectionPool] = None
     
     async def connect(self):
         """Establish connection to Redis server."""
         try:
-            self.redis = redis.Redis(
+            # Shared pool so concurrent requests reuse connections
+            self._pool = redis.ConnectionPool(
                 host=settings.REDIS_HOST,
                 port=settings.REDIS_PORT,
                 db=settings.REDIS_DB,
                 password=settings.REDIS_PASSWORD,
+                max_connections=settings.REDIS_MAX_CONNECTIONS,
                 decode_responses=False,  # Keep binary for audio files
+                socket_keepalive=True,
+                socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+                socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+                health_check_interval=30,
             )
+            self.redis = redis.Redis(connection_pool=self._pool)
             await self.redis.ping()
             logger.info("Successfully connected to Redis")
         except Exception as e:
             logger.error(f"Failed to connect to Redis: {e}")
+            # Leave the client disconnected so optional callers skip Redis
+            # instead of retrying the connection on every call
+            self.redis = None
+            if self._pool is not None:
+                await self._pool.disconnect()
+                self._pool = None
             raise
     
     async def disconnect(self):
@@ -36,14 +60,19 @@ class RedisClient:
         if self.redis:
             await self.redis.close()
             logger.info("Redis connection closed")
+        if self._pool:
+            await self._pool.disconnect()
     
-    async def set_audio(self, key: str, audio_data: bytes, ttl: int = None) -> bool:
+    async def set_audio(self, key: str, audio_data: Union[bytes, bytearray, memoryview], ttl: int = None) -> bool:
         """
         Store audio data in Redis.
         
+        Data is LZ4-compressed when lz4 is installed and compression actually
+        shrinks it (PCM WAV does, MP3/OGG usually do not).
+        
         Args:
             key: Cache key
-            audio_data: Binary audio data
+            audio_data: Binary audio data (any buffer; sent without copying)
             ttl: Time to live in seconds (default from settings)
         
         Returns:
@@ -51,7 +80,12 @@ class RedisClient:
         """
         try:
             ttl = ttl or settings.REDIS_CACHE_TTL
-            await self.redis.setex(key, ttl, audio_data)
+            if lz4_frame is not None:
+                compressed = lz4_frame.compress(audio_data, compression_level=0)
+                if len(compressed) < len(audio_data):
+                    audio_data = compressed
+            # memoryview lets redis-py write the buffer to the socket as-is
+            await self.redis.setex(key, ttl, memoryview(audio_data))
             logger.debug(f"Cached audio with key: {key}")
             return True
         except Exception as e:
@@ -71,12 +105,64 @@ class RedisClient:
         try:
             data = await self.redis.get(key)
             if data:
+                if data[:4] == _LZ4_FRAME_MAGIC:
+                    if lz4_frame is None:
+                        logger.error(f"Cached audio {key} is LZ4-compressed but lz4 is not installed")
+                        return None
+                    data = lz4_frame.decompress(data)
                 logger.debug(f"Retrieved audio with key: {key}")
             return data
         except Exception as e:
             logger.error(f"Failed to retrieve audio: {e}")
             return None
     
+    async def set_json(self, key: str, value: Any, ttl: int = None) -> bool:
+        """
+        Store a JSON-serializable value in Redis.
+        
+        A no-op when Redis isn't connected, so callers can use it as an
+        optional persistence layer behind an in-process cache.
+        
+        Args:
+            key: Cache key
+            value: Value to store (serialized with orjson)
+            ttl: Time to live in seconds (default from settings)
+        
+        Returns:
+            True if successful
+        """
+        if self.redis is None:
+            return False
+        try:
+            await self.redis.setex(key, ttl or settings.REDIS_CACHE_TTL, orjson.dumps(value))
+            logger.debug("Cached JSON with key: %s", key)
+            return True
+        except Exception as e:
+            logger.error("Failed to cache JSON: %s", e)
+            return False
+    
+    async def get_json(self, key: str) -> Any:
+        """
+        Retrieve a JSON value stored with set_json.
+        
+        Args:
+            key: Cache key
+        
+        Returns:
+            Deserialized value, or None if missing or Redis isn't connected
+        """
+        if self.redis is None:
+            return None
+        try:
+            data = await self.redis.get(key)
+            if data:
+                logger.debug("Retrieved JSON with key: %s", key)
+                return orjson.loads(data)
+            return None
+        except Exception as e:
+            logger.error("Failed to retrieve JSON: %s", e)
+            return None
+    
     async def delete_audio(self, key: str) -> bool:
         """
         Delete audio data from Redis.
@@ -2,6 +2,7 @@
 Utility functions for the application.
 """
 import uuid
+import hashlib
 import logging
 from pathlib import Path
 from typing import Optional
@@ -10,6 +11,48 @@ from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Container magic numbers: (offset, magic) -> format
+_AUDIO_MAGIC = {
+    (0, b"RIFF"): "wav",
+    (0, b"OggS"): "ogg",
+    (0, b"fLaC"): "flac",
+    (0, b"\x1aE\xdf\xa3"): "webm",
+    (4, b"ftyp"): "mp4",
+    (0, b"ID3"): "mp3",
+}
+
+# Canonical MIME type per supported extension, sent to Deepgram as-is
+_AUDIO_MIMETYPES = {
+    ".mp3": "audio/mpeg",
+    ".wav": "audio/wav",
+    ".m4a": "audio/mp4",
+    ".flac": "audio/flac",
+    ".ogg": "audio/ogg",
+    ".webm": "audio/webm",
+}
+
+# Source language -> target language (shared with the translation service)
+TARGET_LANGUAGES = {
+    "en": "es",  # English -> Spanish
+    "es": "en",  # Spanish -> English
+}
+
+# Default ElevenLabs voice settings and per-emotion overrides
+_BASE_VOICE_SETTINGS = {
+    "stability": 0.5,
+    "similarity_boost": 0.75,
+    "style": 0.0,
+    "use_speaker_boost": True
+}
+
+_EMOTION_ADJUSTMENTS = {
+    "happy": {"stability": 0.4, "similarity_boost": 0.8, "style": 0.3},
+    "sad": {"stability": 0.7, "similarity_boost": 0.6, "style": 0.0},
+    "angry": {"stability": 0.3, "similarity_boost": 0.9, "style": 0.5},
+    "neutral": {"stability": 0.5, "similarity_boost": 0.75, "style": 0.0},
+    "surprised": {"stability": 0.4, "similarity_boost": 0.8, "style": 0.4},
+}
+
 
 def generate_audio_key(prefix: str = "audio") -> str:
     """
@@ -24,13 +67,58 @@ def generate_audio_key(prefix: str = "audio") -> str:
     return f"cache/{prefix}:{uuid.uuid4()}"
 
 
-def validate_audio_file(file: UploadFile) -> None:
+def generate_content_key(audio_data: bytes, prefix: str = "audio") -> str:
+    """
+    Generate a deterministic cache key from the audio content.
+    
+    Identical uploads map to the same key, so repeated audio (retries,
+    test clips) reuses the cached entry instead of writing a new one.
+    
+    Args:
+        audio_data: Binary audio data
+        prefix: Prefix for the key
+    
+    Returns:
+        Content-addressed key string
+    """
+    digest = hashlib.blake2b(audio_data, digest_size=16).hexdigest()
+    return f"cache/{prefix}:{digest}"
+
+
+def sniff_audio_format(audio_data: bytes) -> Optional[str]:
+    """
+    Detect the audio container from its leading magic bytes.
+    
+    Args:
+        audio_data: Binary audio data (only the first 16 bytes are read)
+    
+    Returns:
+        Format name (wav, ogg, flac, webm, mp4, mp3) or None if unknown
+    """
+    for (offset, magic), audio_format in _AUDIO_MAGIC.items():
+        if audio_data[offset:offset + len(magic)] == magic:
+            return audio_format
+    
+    # MPEG audio without an ID3 tag starts directly with a frame sync
+    if len(audio_data) >= 2 and audio_data[0] == 0xFF and (audio_data[1] & 0xE6) in (0xE2, 0xE4, 0xE6):
+        return "mp3"
+    
+    return None
+
+
+def validate_audio_file(file: UploadFile) -> str:
     """
-    Validate uploaded audio file.
+    Validate uploaded audio file and resolve its MIME type.
+    
+    The MIME type comes from the extension rather than the client's
+    Content-Type, which browsers often send as application/octet-stream.
     
     Args:
         file: Uploaded file
     
+    Returns:
+        Canonical MIME type for the file
+    
     Raises:
         HTTPException: If validation fails
     """
@@ -42,8 +130,46 @@ def validate_audio_file(file: UploadFile) -> None:
             detail=f"Unsupported audio format. Supported: {', '.join(settings.SUPPORTED_AUDIO_FORMATS)}"
         )
     
-    # Note: Size validation should be done during upload with Request.body() size limit
-    logger.debug(f"Audio file validated: {file.filename}")
+    # Note: Size validation is done while reading, see read_audio_file()
+    logger.debug("Audio file validated: %s", file.filename)
+    
+    return _AUDIO_MIMETYPES.get(file_ext) or file.content_type or "audio/wav"
+
+
+async def read_audio_file(file: UploadFile, chunk_size: int = 1 << 20) -> bytes:
+    """
+    Read an uploaded audio file in chunks, enforcing the size limit.
+    
+    Reading incrementally lets oversized uploads be rejected as soon as they
+    cross MAX_AUDIO_SIZE_MB instead of materializing the whole payload first.
+    
+    Args:
+        file: Uploaded file
+        chunk_size: Bytes to read per chunk
+    
+    Returns:
+        Binary audio data
+    
+    Raises:
+        HTTPException: If the file exceeds the maximum size
+    """
+    max_bytes = settings.MAX_AUDIO_SIZE_MB * 1024 * 1024
+    chunks = []
+    total = 0
+    
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        total += len(chunk)
+        if total > max_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Audio file too large. Max size: {settings.MAX_AUDIO_SIZE_MB}MB"
+            )
+        chunks.append(chunk)
+    
+    return b"".join(chunks)
 
 
 def get_target_language(detected_language: str) -> str:
@@ -56,14 +182,9 @@ def get_target_language(detected_language: str) -> str:
     Returns:
         Target language code
     """
-    language_map = {
-        "en": "es",  # English -> Spanish
-        "es": "en",  # Spanish -> English
-    }
-    
     # Normalize language code
     lang_code = detected_language.lower()[:2]
-    return language_map.get(lang_code, "en")
+    return TARGET_LANGUAGES.get(lang_code, "en")
 
 
 def map_emotion_to_voice_settings(emotion: str, attributes: dict) -> dict:
@@ -78,24 +199,11 @@ def map_emotion_to_voice_settings(emotion: str, attributes: dict) -> dict:
         Voice settings dict for ElevenLabs API
     """
     # Base settings
-    voice_settings = {
-        "stability": 0.5,
-        "similarity_boost": 0.75,
-        "style": 0.0,
-        "use_speaker_boost": True
-    }
+    voice_settings = dict(_BASE_VOICE_SETTINGS)
     
     # Adjust based on emotion
-    emotion_adjustments = {
-        "happy": {"stability": 0.4, "similarity_boost": 0.8, "style": 0.3},
-        "sad": {"stability": 0.7, "similarity_boost": 0.6, "style": 0.0},
-        "angry": {"stability": 0.3, "similarity_boost": 0.9, "style": 0.5},
-        "neutral": {"stability": 0.5, "similarity_boost": 0.75, "style": 0.0},
-        "surprised": {"stability": 0.4, "similarity_boost": 0.8, "style": 0.4},
-    }
-    
-    if emotion in emotion_adjustments:
-        voice_settings.update(emotion_adjustments[emotion])
+    if emotion in _EMOTION_ADJUSTMENTS:
+        voice_settings.update(_EMOTION_ADJUSTMENTS[emotion])
     
     # Further adjust based on pitch and energy if available
     if attributes:
@@ -108,7 +216,7 @@ def map_emotion_to_voice_settings(emotion: str, attributes: dict) -> dict:
         elif pitch_mean < 0.4:
             voice_settings["stability"] = min(0.9, voice_settings["stability"] + 0.1)
     
-    logger.debug(f"Voice settings for emotion '{emotion}': {voice_settings}")
+    logger.debug("Voice settings for emotion '%s': %s", emotion, voice_settings)
     return voice_settings
 
 
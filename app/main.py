@@ -2,23 +2,39 @@
 FastAPI Speech Translation API
 Real-time multilingual speech translation with emotion preservation.
 """
+import asyncio
+import json
 import logging
+import orjson
+import time
 import uuid
-import base64
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from dataclasses import dataclass
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
+from starlette.formparsers import MultiPartParser
 from typing import Optional
+from urllib.parse import quote
 
+# SIMD base64 encoder for multi-MB TTS payloads; same API as the stdlib module
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
+
+from app.core.cache import LRUCache
 from app.core.config import settings
+from app.core.executor import run_cpu_bound, shutdown_executor
+from app.core.http_client import http_client
 from app.core.redis_client import redis_client
-from app.core.utils import validate_audio_file, generate_audio_key
+from app.core.utils import validate_audio_file, read_audio_file, generate_content_key
+from app.utils.middleware import TimingMiddleware
 
 # Import service modules
 from app.modules.speech_to_text.service import speech_to_text_service
-from app.modules.emotion_detection.service import emotion_detection_service
+from app.modules.emotion_detection.service import emotion_detection_service, NEUTRAL_ATTRIBUTES
 from app.modules.translation.service import translation_service
 from app.modules.text_to_speech.service import text_to_speech_service
 
@@ -35,23 +51,50 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Log separators, built once instead of per log call
+_SEP_SM = "-" * 80
+_MB = 1024 * 1024
+
+# Raw bytes per streamed base64 chunk; a multiple of 3 so chunks encode
+# without padding and concatenate into one valid base64 string
+_B64_CHUNK_SIZE = 3 * 64 * 1024
+
+# Completed pipeline results keyed by audio content hash. Identical uploads
+# (client retries, test phrases) skip STT, translation and TTS entirely.
+pipeline_cache = LRUCache(
+    max_entries=settings.PIPELINE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.PIPELINE_CACHE_TTL,
+)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager for startup and shutdown events."""
     # Startup
     logger.info("Starting Speech Translation API...")
+    # Warm up OpenSmile off the event loop so the first request doesn't pay
+    # for its lazy initialization (never raises)
+    await run_cpu_bound(emotion_detection_service.warmup)
+    # Preconnect to Deepgram, DeepL and ElevenLabs in the background so the
+    # first request finds warm connections without delaying startup
+    preconnect = asyncio.gather(
+        speech_to_text_service.warmup(),
+        translation_service.warmup(),
+        text_to_speech_service.warmup(),
+    )
     try:
         await redis_client.connect()
         logger.info("Application started successfully")
     except Exception as e:
-        logger.error(f"Failed to start application: {e}")
+        logger.error("Failed to start application: %s", e)
     
     yield
     
     # Shutdown
     logger.info("Shutting down Speech Translation API...")
-    await speech_to_text_service.cleanup()
+    preconnect.cancel()
+    await http_client.close()
+    shutdown_executor()
     await redis_client.disconnect()
     logger.info("Application shutdown complete")
 
@@ -62,17 +105,37 @@ app = FastAPI(
     version=settings.APP_VERSION,
     description="Real-time multilingual speech translation with emotion preservation",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,  # Faster serialization of large base64 payloads
 )
 
-# Configure CORS
+# The pipeline reads every upload fully into memory anyway, so keep uploads
+# up to the size limit in the spool buffer instead of writing them through a
+# temp file on disk first (Starlette spills to disk above 1 MB by default)
+MultiPartParser.max_file_size = settings.MAX_AUDIO_SIZE_MB * 1024 * 1024
+
+# Configure CORS with explicit methods and headers so preflight responses are
+# static instead of echoing whatever the browser asked for
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=settings.CORS_ORIGINS,
+    # A wildcard with credentials would make Starlette echo any Origin back
+    allow_credentials="*" not in settings.CORS_ORIGINS,
+    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_headers=["Accept", "Authorization", "Content-Type"],
+    expose_headers=[
+        "X-Original-Text",
+        "X-Original-Language",
+        "X-Translated-Text",
+        "X-Target-Language",
+        "X-Emotion",
+        "X-Emotion-Attributes",
+        "X-Process-Time",
+    ],
 )
 
+# Outermost, so the header covers CORS handling as well
+app.add_middleware(TimingMiddleware)
+
 # Include module routers
 app.include_router(stt_router, prefix="/api")
 app.include_router(emotion_router, prefix="/api")
@@ -80,6 +143,129 @@ app.include_router(translation_router, prefix="/api")
 app.include_router(tts_router, prefix="/api")
 
 
+async def _stream_json_with_audio(fields: dict, audio: bytes):
+    """
+    Stream a JSON object whose audio_base64 field is encoded chunk by chunk.
+    
+    Avoids holding the full base64 string and its serialized copy in memory
+    at once, and lets the client start reading while the rest is encoded.
+    
+    Args:
+        fields: JSON fields other than the audio
+        audio: Raw audio bytes to embed as base64
+    
+    Yields:
+        UTF-8 encoded JSON fragments
+    """
+    head = orjson.dumps({**fields, "audio_size_bytes": len(audio)})
+    yield head[:-1] + b',"audio_base64":"'
+    
+    view = memoryview(audio)
+    for offset in range(0, len(view), _B64_CHUNK_SIZE):
+        yield base64.b64encode(view[offset:offset + _B64_CHUNK_SIZE])
+    
+    yield b'"}'
+
+
+def _prefers_audio(accept: str) -> bool:
+    """
+    Decide whether an Accept header prefers MP3 over JSON.
+    
+    Each candidate takes the q-value of its most specific matching media
+    range (audio/mpeg over audio/* over */*); ties go to JSON, the
+    documented default.
+    
+    Args:
+        accept: Raw Accept header value
+    
+    Returns:
+        True if audio/mpeg has a strictly higher q-value than application/json
+    """
+    # (specificity, q) of the best matching range per candidate
+    audio_q = json_q = (-1, 0.0)
+    for media_range in accept.split(","):
+        media_type, *params = media_range.split(";")
+        media_type = media_type.strip().lower()
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        
+        if media_type == "*/*":
+            specificity = 0
+        elif media_type in ("audio/*", "application/*"):
+            specificity = 1
+        else:
+            specificity = 2
+        
+        if media_type in ("audio/mpeg", "audio/*", "*/*") and specificity > audio_q[0]:
+            audio_q = (specificity, q)
+        if media_type in ("application/json", "application/*", "*/*") and specificity > json_q[0]:
+            json_q = (specificity, q)
+    
+    # A type no range matches keeps q=0, i.e. not acceptable
+    return audio_q[1] > json_q[1]
+
+
+def _audio_response(result: dict) -> Response:
+    """
+    Build a raw MP3 response with the pipeline metadata in headers.
+    
+    Args:
+        result: Pipeline result from run_pipeline
+    
+    Returns:
+        Audio response; text values are URL-encoded
+    """
+    headers = {
+        "X-Original-Text": quote(result["original_text"]),
+        "X-Original-Language": result["original_language"],
+        "X-Translated-Text": quote(result["translated_text"]),
+        "X-Target-Language": result["target_language"],
+        "X-Emotion": result["emotion"],
+        "X-Emotion-Attributes": json.dumps(result["emotion_attributes"]),
+    }
+    
+    return Response(
+        content=result["audio"],
+        media_type="audio/mpeg",
+        headers=headers,
+    )
+
+
+async def _timed(coro):
+    """
+    Await a coroutine and measure its own duration.
+    
+    Used for stages that run concurrently, where the shared wall-clock time
+    would otherwise be attributed to every stage.
+    
+    Returns:
+        Tuple of (result or raised exception, duration in seconds)
+    """
+    start = time.perf_counter()
+    try:
+        result = await coro
+    except Exception as e:
+        result = e
+    return result, time.perf_counter() - start
+
+
+@dataclass(slots=True)
+class StageTimings:
+    """Per-stage durations in seconds for one pipeline run."""
+    validation: float = 0.0
+    transcription: float = 0.0
+    emotion_detection: float = 0.0
+    translation: float = 0.0
+    audio_generation: float = 0.0
+    failed_stage: Optional[str] = None
+
+
 class ProcessAudioResponse(BaseModel):
     """Response model for process-audio endpoint."""
     original_text: str
@@ -113,120 +299,105 @@ async def health_check():
     }
 
 
-@app.post("/api/process-audio", response_model=ProcessAudioResponse)
-async def process_audio(audio: UploadFile = File(...)):
+async def run_pipeline(audio: UploadFile) -> dict:
     """
-    Unified API endpoint for complete speech translation pipeline with emotion preservation.
-    
-    Pipeline Flow:
-    1. Speech-to-Text (Deepgram) - Transcribe audio and detect source language
-    2. Emotion Detection (OpenSmile) - Extract emotional characteristics from audio
-    3. Text Translation (DeepL) - Translate text to target language (EN ↔ ES)
-    4. Text-to-Speech (ElevenLabs) - Generate emotional speech in target language
+    Run the full speech translation pipeline on an uploaded audio file.
     
-    Features:
-    - Automatic bidirectional language detection (English ↔ Spanish)
-    - Emotion preservation throughout the pipeline
-    - Comprehensive error handling at each stage
-    - Performance tracking and detailed logging
-    - Redis caching for audio data
+    Shared by the JSON and binary process-audio endpoints.
     
     Args:
-        audio: Audio file (mp3, wav, m4a, flac, ogg, webm)
-               Max size: 25MB
+        audio: Uploaded audio file
     
     Returns:
-        ProcessAudioResponse with:
-        - Original transcribed text and language
-        - Translated text and target language
-        - Detected emotion and attributes
-        - Generated audio (base64 encoded)
+        Dictionary with transcription, translation and emotion fields plus
+        the generated audio bytes under 'audio'
     
     Raises:
         HTTPException: 400 for invalid input, 500 for processing errors
     """
-    import time
-    
-    cache_key = None
-    pipeline_start = time.time()
+    pipeline_start = time.perf_counter()
     
     # Pipeline stage tracking
-    stages = {
-        "validation": {"status": "pending", "duration": 0},
-        "transcription": {"status": "pending", "duration": 0},
-        "emotion_detection": {"status": "pending", "duration": 0},
-        "translation": {"status": "pending", "duration": 0},
-        "audio_generation": {"status": "pending", "duration": 0},
-    }
+    timings = StageTimings()
     
     try:
         # ============================================================
         # STAGE 0: Validation & Preparation
         # ============================================================
-        stage_start = time.time()
-        logger.info("=" * 80)
-        logger.info(f"🎙️  PIPELINE START: {audio.filename}")
-        logger.info("=" * 80)
+        stage_start = time.perf_counter()
+        logger.debug("🎙️  PIPELINE START: %s", audio.filename)
         
         # Validate audio file
         try:
-            validate_audio_file(audio)
-            logger.info(f"✓ Audio validation passed: {audio.filename}")
+            mimetype = validate_audio_file(audio)
+            logger.debug("✓ Audio validation passed: %s", audio.filename)
         except Exception as e:
-            logger.error(f"✗ Audio validation failed: {str(e)}")
+            logger.error("✗ Audio validation failed: %s", e)
             raise HTTPException(status_code=400, detail=f"Invalid audio file: {str(e)}")
         
-        # Read audio data
-        audio_data = await audio.read()
-        audio_size_mb = len(audio_data) / (1024 * 1024)
-        logger.info(f"📊 Audio size: {audio_size_mb:.2f} MB ({len(audio_data)} bytes)")
+        # Read audio data in chunks, rejecting oversized uploads early
+        audio_data = await read_audio_file(audio)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("📊 Audio size: %.2f MB (%d bytes)", len(audio_data) / _MB, len(audio_data))
+        
+        # Serve repeat uploads of the same audio from the result cache
+        cache_key = generate_content_key(audio_data)
+        cached = pipeline_cache.get(cache_key)
+        if cached is not None:
+            logger.info("♻️  Pipeline cache hit: %s", cache_key)
+            return dict(cached)
         
-        # Cache audio in Redis for potential retry/debugging
-        cache_key = generate_audio_key()
-        await redis_client.set_audio(cache_key, audio_data)
-        logger.info(f"💾 Audio cached: {cache_key}")
+        # Cache audio in Redis for debugging, keyed by content so repeated
+        # uploads reuse the existing entry. Nothing reads it back in the
+        # pipeline, so production skips the write entirely.
+        if settings.DEBUG:
+            if await redis_client.exists(cache_key):
+                logger.info("💾 Audio already cached: %s", cache_key)
+            else:
+                await redis_client.set_audio(cache_key, audio_data)
+                logger.info("💾 Audio cached: %s", cache_key)
         
-        stages["validation"]["status"] = "completed"
-        stages["validation"]["duration"] = time.time() - stage_start
+        timings.validation = time.perf_counter() - stage_start
         
         # ============================================================
         # STAGE 1 & 2: Parallel Speech-to-Text + Emotion Detection
         # ============================================================
-        import asyncio
-        
-        parallel_start = time.time()
-        logger.info("-" * 80)
-        logger.info("⚡ STAGE 1 & 2: PARALLEL Processing (STT + Emotion)")
-        logger.info("-" * 80)
+        parallel_start = time.perf_counter()
+        logger.debug(_SEP_SM)
+        logger.debug("⚡ STAGE 1 & 2: PARALLEL Processing (STT + Emotion)")
+        logger.debug(_SEP_SM)
         
         # Run Speech-to-Text and Emotion Detection in parallel
         # Both use the same audio data and are independent
         try:
-            stt_task = speech_to_text_service.transcribe_audio(
-                audio_data,
-                mimetype=audio.content_type or "audio/wav"
-            )
-            emotion_task = emotion_detection_service.detect_emotion(
-                audio_data,
-                filename=audio.filename
-            )
-            
-            # Execute both tasks concurrently
-            logger.info("🚀 Running STT and Emotion Detection concurrently...")
-            transcription, emotion_result = await asyncio.gather(
-                stt_task,
-                emotion_task,
-                return_exceptions=True
-            )
+            # Execute both tasks concurrently, timing each one individually
+            logger.debug("🚀 Running STT and Emotion Detection concurrently...")
+            stt_task = asyncio.create_task(_timed(
+                speech_to_text_service.transcribe_audio(
+                    audio_data,
+                    mimetype=mimetype
+                )
+            ))
+            emotion_task = asyncio.create_task(_timed(
+                emotion_detection_service.detect_emotion(
+                    audio_data,
+                    filename=audio.filename
+                )
+            ))
             
-            parallel_duration = time.time() - parallel_start
-            logger.info(f"⚡ Parallel execution completed in {parallel_duration:.2f}s")
+            # STT failure aborts the pipeline, so don't keep emotion
+            # detection running (or queued for a worker) once it happens
+            try:
+                transcription, stt_duration = await stt_task
+            except BaseException:
+                emotion_task.cancel()
+                raise
             
             # Handle transcription result
             if isinstance(transcription, Exception):
-                stages["transcription"]["status"] = "failed"
-                stages["transcription"]["error"] = str(transcription)
-                logger.error(f"✗ Transcription failed: {str(transcription)}")
+                emotion_task.cancel()
+                timings.failed_stage = "transcription"
+                logger.error("✗ Transcription failed: %s", transcription)
                 raise HTTPException(
                     status_code=500,
                     detail=f"Speech-to-text transcription failed: {str(transcription)}"
@@ -236,40 +407,49 @@ async def process_audio(audio: UploadFile = File(...)):
             original_language = transcription["language"]
             source_lang_code = transcription["language_code"]
             
-            logger.info(f"✓ Transcription successful")
-            logger.info(f"  Language: {original_language} ({source_lang_code})")
-            logger.info(f"  Text: {original_text[:100]}{'...' if len(original_text) > 100 else ''}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("✓ Transcription successful")
+                logger.debug("  Language: %s (%s)", original_language, source_lang_code)
+                logger.debug("  Text: %.100s%s", original_text, "..." if len(original_text) > 100 else "")
+            
+            timings.transcription = stt_duration
             
-            stages["transcription"]["status"] = "completed"
-            stages["transcription"]["duration"] = parallel_duration
+            emotion_result, emotion_duration = await emotion_task
+            
+            parallel_duration = time.perf_counter() - parallel_start
+            logger.debug("⚡ Parallel execution completed in %.2fs", parallel_duration)
             
             # Handle emotion detection result
             if isinstance(emotion_result, Exception):
-                stages["emotion_detection"]["status"] = "failed"
-                stages["emotion_detection"]["error"] = str(emotion_result)
-                logger.warning(f"⚠ Emotion detection failed, using neutral: {str(emotion_result)}")
+                timings.failed_stage = "emotion_detection"
+                logger.warning("⚠ Emotion detection failed, using neutral: %s", emotion_result)
                 # Fallback to neutral emotion
                 emotion = "neutral"
-                emotion_attributes = {
-                    "pitch_mean": 0.5,
-                    "energy": 0.5,
-                    "speaking_rate": 0.5,
-                }
+                emotion_attributes = dict(NEUTRAL_ATTRIBUTES)
+            elif emotion_result.get("fallback"):
+                # detect_emotion swallowed a processing error; the neutral
+                # result stands but mustn't be cached as a real detection
+                timings.failed_stage = "emotion_detection"
+                logger.warning("⚠ Emotion detection fell back to neutral")
+                emotion = emotion_result["emotion"]
+                emotion_attributes = emotion_result["attributes"]
             else:
                 emotion = emotion_result["emotion"]
                 emotion_attributes = emotion_result["attributes"]
                 
-                logger.info(f"✓ Emotion detection successful")
-                logger.info(f"  Emotion: {emotion}")
-                logger.info(f"  Attributes: pitch={emotion_attributes.get('pitch_mean', 0):.2f}, "
-                           f"energy={emotion_attributes.get('energy', 0):.2f}, "
-                           f"rate={emotion_attributes.get('speaking_rate', 0):.2f}")
+                logger.debug("✓ Emotion detection successful")
+                logger.debug("  Emotion: %s", emotion)
+                logger.debug(
+                    "  Attributes: pitch=%.2f, energy=%.2f, rate=%.2f",
+                    emotion_attributes.get("pitch_mean", 0),
+                    emotion_attributes.get("energy", 0),
+                    emotion_attributes.get("speaking_rate", 0),
+                )
                 
-                stages["emotion_detection"]["status"] = "completed"
-                stages["emotion_detection"]["duration"] = parallel_duration
-            
+                timings.emotion_detection = emotion_duration
+        
         except Exception as e:
-            logger.error(f"✗ Parallel processing failed: {str(e)}")
+            logger.error("✗ Parallel processing failed: %s", e)
             raise HTTPException(
                 status_code=500,
                 detail=f"Parallel processing failed: {str(e)}"
@@ -278,10 +458,10 @@ async def process_audio(audio: UploadFile = File(...)):
         # ============================================================
         # STAGE 3: Text Translation
         # ============================================================
-        stage_start = time.time()
-        logger.info("-" * 80)
-        logger.info("🌐 STAGE 3: Text Translation")
-        logger.info("-" * 80)
+        stage_start = time.perf_counter()
+        logger.debug(_SEP_SM)
+        logger.debug("🌐 STAGE 3: Text Translation")
+        logger.debug(_SEP_SM)
         
         try:
             translation_result = await translation_service.translate_text(
@@ -291,17 +471,16 @@ async def process_audio(audio: UploadFile = File(...)):
             translated_text = translation_result["translated_text"]
             target_language = translation_result["target_language"]
             
-            logger.info(f"✓ Translation successful")
-            logger.info(f"  Direction: {source_lang_code.upper()} → {target_language.upper()}")
-            logger.info(f"  Translated: {translated_text[:100]}{'...' if len(translated_text) > 100 else ''}")
-            
-            stages["translation"]["status"] = "completed"
-            stages["translation"]["duration"] = time.time() - stage_start
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("✓ Translation successful")
+                logger.debug("  Direction: %s → %s", source_lang_code.upper(), target_language.upper())
+                logger.debug("  Translated: %.100s%s", translated_text, "..." if len(translated_text) > 100 else "")
             
+            timings.translation = time.perf_counter() - stage_start
+        
         except Exception as e:
-            stages["translation"]["status"] = "failed"
-            stages["translation"]["error"] = str(e)
-            logger.error(f"✗ Translation failed: {str(e)}")
+            timings.failed_stage = "translation"
+            logger.error("✗ Translation failed: %s", e)
             raise HTTPException(
                 status_code=500,
                 detail=f"Text translation failed: {str(e)}"
@@ -310,10 +489,10 @@ async def process_audio(audio: UploadFile = File(...)):
         # ============================================================
         # STAGE 4: Text-to-Speech Generation with Emotion
         # ============================================================
-        stage_start = time.time()
-        logger.info("-" * 80)
-        logger.info("🔊 STAGE 4: Emotional Text-to-Speech Generation")
-        logger.info("-" * 80)
+        stage_start = time.perf_counter()
+        logger.debug(_SEP_SM)
+        logger.debug("🔊 STAGE 4: Emotional Text-to-Speech Generation")
+        logger.debug(_SEP_SM)
         
         try:
             generated_audio = await text_to_speech_service.generate_audio(
@@ -323,18 +502,16 @@ async def process_audio(audio: UploadFile = File(...)):
                 language_code=target_language,
             )
             
-            output_size_mb = len(generated_audio) / (1024 * 1024)
-            logger.info(f"✓ Audio generation successful")
-            logger.info(f"  Size: {output_size_mb:.2f} MB ({len(generated_audio)} bytes)")
-            logger.info(f"  Emotion applied: {emotion}")
-            
-            stages["audio_generation"]["status"] = "completed"
-            stages["audio_generation"]["duration"] = time.time() - stage_start
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("✓ Audio generation successful")
+                logger.debug("  Size: %.2f MB (%d bytes)", len(generated_audio) / _MB, len(generated_audio))
+                logger.debug("  Emotion applied: %s", emotion)
             
+            timings.audio_generation = time.perf_counter() - stage_start
+        
         except Exception as e:
-            stages["audio_generation"]["status"] = "failed"
-            stages["audio_generation"]["error"] = str(e)
-            logger.error(f"✗ Audio generation failed: {str(e)}")
+            timings.failed_stage = "audio_generation"
+            logger.error("✗ Audio generation failed: %s", e)
             raise HTTPException(
                 status_code=500,
                 detail=f"Text-to-speech generation failed: {str(e)}"
@@ -343,37 +520,41 @@ async def process_audio(audio: UploadFile = File(...)):
         # ============================================================
         # FINALIZATION
         # ============================================================
-        # Encode audio to base64 for JSON response
-        audio_base64 = base64.b64encode(generated_audio).decode('utf-8')
+        # Calculate total pipeline duration
+        total_duration = time.perf_counter() - pipeline_start
         
-        # Clean up cache
-        if cache_key:
-            await redis_client.delete_audio(cache_key)
-            logger.debug(f"🗑️  Cache cleaned: {cache_key}")
+        # One summary line per request
+        logger.info(
+            "✅ Pipeline completed file=%s %s→%s emotion=%s total=%.3fs "
+            "validation=%.3fs stt=%.3fs emotion_detection=%.3fs translation=%.3fs tts=%.3fs size=%d",
+            audio.filename,
+            source_lang_code,
+            target_language,
+            emotion,
+            total_duration,
+            timings.validation,
+            timings.transcription,
+            timings.emotion_detection,
+            timings.translation,
+            timings.audio_generation,
+            len(generated_audio),
+        )
         
-        # Calculate total pipeline duration
-        total_duration = time.time() - pipeline_start
+        result = {
+            "original_text": original_text,
+            "original_language": original_language,
+            "translated_text": translated_text,
+            "target_language": target_language,
+            "emotion": emotion,
+            "emotion_attributes": emotion_attributes,
+            "audio": generated_audio,
+        }
         
-        logger.info("=" * 80)
-        logger.info(f"✅ PIPELINE COMPLETED SUCCESSFULLY")
-        logger.info(f"⏱️  Total Duration: {total_duration:.2f}s")
-        logger.info(f"   - Validation: {stages['validation']['duration']:.2f}s")
-        logger.info(f"   - Transcription: {stages['transcription']['duration']:.2f}s")
-        logger.info(f"   - Emotion Detection: {stages['emotion_detection']['duration']:.2f}s")
-        logger.info(f"   - Translation: {stages['translation']['duration']:.2f}s")
-        logger.info(f"   - Audio Generation: {stages['audio_generation']['duration']:.2f}s")
-        logger.info("=" * 80)
+        # Don't pin a neutral fallback from a transient emotion failure
+        if timings.failed_stage is None:
+            pipeline_cache.set(cache_key, result)
         
-        return ProcessAudioResponse(
-            original_text=original_text,
-            original_language=original_language,
-            translated_text=translated_text,
-            target_language=target_language,
-            emotion=emotion,
-            emotion_attributes=emotion_attributes,
-            audio_base64=audio_base64,
-            audio_size_bytes=len(generated_audio),
-        )
+        return dict(result)
     
     except HTTPException:
         # Re-raise HTTP exceptions as-is
@@ -381,18 +562,7 @@ async def process_audio(audio: UploadFile = File(...)):
     
     except Exception as e:
         # Handle unexpected errors
-        logger.error("=" * 80)
-        logger.error(f"❌ PIPELINE FAILED")
-        logger.error(f"Error: {str(e)}")
-        logger.error(f"Stage Status: {stages}")
-        logger.error("=" * 80)
-        
-        # Clean up cache on error
-        if cache_key:
-            try:
-                await redis_client.delete_audio(cache_key)
-            except:
-                pass
+        logger.error("❌ Pipeline failed file=%s error=%s timings=%s", audio.filename, e, timings)
         
         raise HTTPException(
             status_code=500,
@@ -400,6 +570,101 @@ async def process_audio(audio: UploadFile = File(...)):
         )
 
 
+@app.post(
+    "/api/process-audio",
+    response_model=ProcessAudioResponse,
+    responses={
+        200: {
+            "content": {"audio/mpeg": {}},
+            "description": "JSON with base64 audio, or raw MP3 with metadata headers when the Accept header prefers audio/mpeg",
+        },
+    },
+)
+async def process_audio(request: Request, audio: UploadFile = File(...)):
+    """
+    Unified API endpoint for complete speech translation pipeline with emotion preservation.
+    
+    Pipeline Flow:
+    1. Speech-to-Text (Deepgram) - Transcribe audio and detect source language
+    2. Emotion Detection (OpenSmile) - Extract emotional characteristics from audio
+    3. Text Translation (DeepL) - Translate text to target language (EN ↔ ES)
+    4. Text-to-Speech (ElevenLabs) - Generate emotional speech in target language
+    
+    Features:
+    - Automatic bidirectional language detection (English ↔ Spanish)
+    - Emotion preservation throughout the pipeline
+    - Comprehensive error handling at each stage
+    - Performance tracking and detailed logging
+    - Redis caching for audio data (DEBUG only)
+    - Repeat uploads of identical audio served from an in-process cache
+    
+    Args:
+        audio: Audio file (mp3, wav, m4a, flac, ogg, webm)
+               Max size: 25MB
+    
+    Returns:
+        ProcessAudioResponse with:
+        - Original transcribed text and language
+        - Translated text and target language
+        - Detected emotion and attributes
+        - Generated audio (base64 encoded)
+    
+    Note:
+        Base64 inflates the audio by a third; clients whose Accept header
+        ranks ``audio/mpeg`` (or ``audio/*``) above ``application/json`` get
+        the raw MP3 with metadata headers instead, same as
+        /api/process-audio/binary.
+    
+    Raises:
+        HTTPException: 400 for invalid input, 500 for processing errors
+    """
+    result = await run_pipeline(audio)
+    
+    # Clients asking for audio skip the base64 encoding entirely; both
+    # variants vary on Accept so shared caches keep them apart
+    if _prefers_audio(request.headers.get("accept", "")):
+        response = _audio_response(result)
+        response.headers["Vary"] = "Accept"
+        return response
+    
+    generated_audio = result.pop("audio")
+    
+    # Stream the JSON body so the base64 audio is encoded in small chunks as
+    # it is sent; the fields match ProcessAudioResponse, which stays the
+    # documented schema
+    return StreamingResponse(
+        _stream_json_with_audio(result, generated_audio),
+        media_type="application/json",
+        headers={"Vary": "Accept"},
+    )
+
+
+@app.post("/api/process-audio/binary")
+async def process_audio_binary(audio: UploadFile = File(...)):
+    """
+    Binary variant of the speech translation pipeline.
+    
+    Runs the same pipeline as /api/process-audio but returns the generated
+    audio as raw MP3 instead of base64 in JSON, skipping the encode pass and
+    the 33% size overhead. Metadata is returned in response headers; text
+    values are URL-encoded.
+    
+    Args:
+        audio: Audio file (mp3, wav, m4a, flac, ogg, webm)
+               Max size: 25MB
+    
+    Returns:
+        Audio file (MP3) with X-Original-Text, X-Original-Language,
+        X-Translated-Text, X-Target-Language, X-Emotion and
+        X-Emotion-Attributes headers
+    
+    Raises:
+        HTTPException: 400 for invalid input, 500 for processing errors
+    """
+    result = await run_pipeline(audio)
+    return _audio_response(result)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -407,4 +672,8 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=settings.DEBUG,
+        loop="uvloop",  # libuv event loop (installed via uvicorn[standard])
+        http="httptools",  # C HTTP parser
+        # Worker processes sidestep the GIL for OpenSmile; reload needs one
+        workers=1 if settings.DEBUG else settings.WEB_CONCURRENCY,
     )
@@ -3,9 +3,10 @@ Router for emotion detection endpoints.
 """
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from pydantic import BaseModel
-from typing import Dict
+from typing import Dict, List
+from app.core.config import settings
 from app.modules.emotion_detection.service import emotion_detection_service
-from app.core.utils import validate_audio_file
+from app.core.utils import validate_audio_file, read_audio_file
 
 router = APIRouter(prefix="/emotion", tags=["Emotion Detection"])
 
@@ -31,8 +32,8 @@ async def detect_emotion(audio: UploadFile = File(...)):
         # Validate audio file
         validate_audio_file(audio)
         
-        # Read audio data
-        audio_data = await audio.read()
+        # Read audio data in chunks, rejecting oversized uploads early
+        audio_data = await read_audio_file(audio)
         
         # Detect emotion
         result = await emotion_detection_service.detect_emotion(
@@ -42,7 +43,48 @@ async def detect_emotion(audio: UploadFile = File(...)):
         
         return result
     
+    except HTTPException:
+        # Keep validation/size errors (400/413) as-is
+        raise
+    
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/detect-batch", response_model=List[EmotionResponse])
+async def detect_emotions_batch(audio: List[UploadFile] = File(...)):
+    """
+    Detect emotion for several short audio files in one request.
+    
+    The clips are extracted together in a single worker job, which avoids
+    one thread-pool round trip per clip for runs of short utterances.
+    
+    Args:
+        audio: Audio files (mp3, wav, m4a, flac, ogg, webm)
+    
+    Returns:
+        Detected emotion and acoustic attributes per file, in upload order
+    """
+    if len(audio) > settings.EMOTION_BATCH_MAX_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many files: at most {settings.EMOTION_BATCH_MAX_FILES} per request",
+        )
+    
+    try:
+        clips = []
+        for upload in audio:
+            validate_audio_file(upload)
+            clips.append(await read_audio_file(upload))
+        
+        return await emotion_detection_service.detect_emotions_batch(
+            clips,
+            filenames=[upload.filename for upload in audio],
+        )
+    
+    except HTTPException:
+        # Keep validation/size errors (400/413) as-is
+        raise
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -2,14 +2,157 @@
 Emotion detection service using OpenSmile.
 Extracts emotional attributes from audio (pitch, tone, energy).
 """
+import asyncio
+import contextlib
+import hashlib
+import io
 import logging
+import struct
 import tempfile
 import os
-from typing import Dict
+import weakref
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 
+import numpy as np
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.executor import run_cpu_bound
+from app.core.redis_client import redis_client
+from app.core.utils import sniff_audio_format
+
+try:
+    import soundfile as sf
+except ImportError:
+    sf = None
+
 logger = logging.getLogger(__name__)
 
+# Attributes reported when emotion cannot be detected
+NEUTRAL_ATTRIBUTES = {
+    "pitch_mean": 0.5,
+    "energy": 0.5,
+    "speaking_rate": 0.5,
+}
+
+# Classifier labels, in score order
+_EMOTIONS = ("neutral", "angry", "happy", "sad", "surprised")
+
+# eGeMAPSv02 functionals used for attributes: pitch, energy, speaking rate
+_ATTRIBUTE_FEATURES = (
+    "F0semitoneFrom27.5Hz_sma3nz_amean",
+    "loudness_sma3_amean",
+    "loudness_sma3_percentile20.0",
+)
+
+# Attribute names for those features, and the affine map of each raw value
+# into the 0-1 range (rough estimates): (raw + offset) / scale
+_ATTRIBUTE_NAMES = ("pitch_mean", "energy", "speaking_rate")
+_ATTRIBUTE_OFFSETS = np.array([100.0, 40.0, 40.0])
+_ATTRIBUTE_SCALES = np.array([200.0, 80.0, 80.0])
+
+_INF = float("inf")
+
+# _classify_emotion's scoring rules as data, for classify_batch: (emotion,
+# weight, closed, pitch range, energy range, speaking rate range). A rule adds
+# its weight to the emotion's score when every attribute lies inside its
+# range; ranges are open bounds unless closed is set. Keep both in sync.
+_SCORE_RULES = (
+    # ANGRY: High pitch + high energy + potentially fast rate
+    ("angry", 3, False, (0.65, _INF), (0.55, _INF), (-_INF, _INF)),  # Strong indicator
+    ("angry", 2, False, (0.62, _INF), (0.52, _INF), (-_INF, _INF)),  # Moderate indicator
+    ("angry", 2, False, (-_INF, _INF), (0.75, _INF), (-_INF, _INF)),  # Very high energy
+    ("angry", 1, False, (0.7, _INF), (-_INF, _INF), (0.55, _INF)),  # Fast aggressive speech
+    # HAPPY: Moderate-high pitch + moderate energy + faster rate
+    ("happy", 3, False, (0.55, 0.68), (0.48, 0.62), (0.52, _INF)),  # Balanced positive
+    ("happy", 2, False, (0.58, 0.65), (0.5, _INF), (-_INF, _INF)),  # Pleasant tone
+    ("happy", 1, False, (-_INF, _INF), (0.48, _INF), (0.58, _INF)),  # Energetic speech
+    # SURPRISED: Very high pitch with moderate energy
+    ("surprised", 3, False, (0.78, _INF), (-_INF, _INF), (-_INF, _INF)),  # Very high pitch
+    ("surprised", 2, False, (0.72, _INF), (-_INF, 0.65), (-_INF, _INF)),  # High pitch, not too loud
+    ("surprised", 1, False, (0.75, _INF), (0.45, 0.6), (-_INF, _INF)),  # Startled pattern
+    # SAD: Low pitch + low energy + slow rate
+    ("sad", 3, False, (-_INF, 0.42), (-_INF, 0.42), (-_INF, _INF)),  # Strong sad indicator
+    ("sad", 2, False, (-_INF, 0.48), (-_INF, 0.48), (-_INF, _INF)),  # Moderate sad indicator
+    ("sad", 2, False, (-_INF, _INF), (-_INF, 0.38), (-_INF, _INF)),  # Very low energy
+    ("sad", 1, False, (-_INF, _INF), (-_INF, 0.5), (-_INF, 0.45)),  # Slow, low energy
+    # NEUTRAL: Moderate values across all attributes
+    ("neutral", 2, True, (0.45, 0.62), (0.42, 0.58), (-_INF, _INF)),  # Balanced moderate values
+    ("neutral", 1, True, (-_INF, _INF), (-_INF, _INF), (0.48, 0.55)),  # Normal speaking rate
+)
+
+# The same rules as parallel arrays for batch classification: per-rule lower
+# and upper bounds (n_rules, 3), closed flags, and weights spread over the
+# emotion columns (n_rules, n_emotions)
+_RULE_LO = np.array([[p[0], e[0], r[0]] for _, _, _, p, e, r in _SCORE_RULES])
+_RULE_HI = np.array([[p[1], e[1], r[1]] for _, _, _, p, e, r in _SCORE_RULES])
+_RULE_CLOSED = np.array([closed for _, _, closed, _, _, _ in _SCORE_RULES])
+_RULE_WEIGHTS = np.array(
+    [[weight if name == emotion else 0 for name in _EMOTIONS] for emotion, weight, *_ in _SCORE_RULES],
+    dtype=np.int16,
+)
+
+# Sniffed format -> temp-file suffix for the OpenSmile file fallback
+_FORMAT_SUFFIXES = {
+    "wav": ".wav",
+    "ogg": ".ogg",
+    "flac": ".flac",
+    "webm": ".webm",
+    "mp4": ".m4a",
+    "mp3": ".mp3",
+}
+
+# Containers libsndfile cannot decode; these go straight to the file fallback
+_FILE_ONLY_FORMATS = frozenset(("mp4", "webm"))
+
+# RAM-backed directory for small temp files (Linux); larger files go to the
+# default temp dir so they can't exhaust the small /dev/shm of containers
+_SHM_DIR = "/dev/shm" if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK) else None
+_SHM_MAX_BYTES = 2 * 1024 * 1024
+
+# Canonical 44-byte RIFF/WAVE header: RIFF chunk, 16-byte fmt chunk, data chunk
+_WAV_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")
+
+
+def _decode_pcm16_wav(buf: bytes) -> Optional[Tuple[np.ndarray, int]]:
+    """
+    Decode a canonical 16-bit PCM WAV without going through a decoder library.
+    
+    Args:
+        buf: Binary audio data
+    
+    Returns:
+        Tuple of (mono float32 signal, sampling rate), or None if the buffer
+        is not a canonical PCM16 WAV (other layouts go through soundfile)
+    """
+    if len(buf) < _WAV_HEADER.size:
+        return None
+    
+    (riff, _, wave, fmt, fmt_size, audio_format, channels,
+     sample_rate, _, _, bits, data_id, data_size) = _WAV_HEADER.unpack_from(buf, 0)
+    
+    if riff != b"RIFF" or wave != b"WAVE" or fmt != b"fmt " or data_id != b"data":
+        return None
+    if fmt_size != 16 or audio_format != 1 or bits != 16 or channels == 0:
+        return None
+    
+    available = min(data_size, len(buf) - _WAV_HEADER.size)
+    frames = available // (2 * channels)
+    pcm = np.frombuffer(buf, dtype="<i2", count=frames * channels, offset=_WAV_HEADER.size)
+    signal = pcm.astype(np.float32) / 32768.0
+    
+    # Collapse multi-channel audio to mono
+    if channels > 1:
+        signal = signal.reshape(frames, channels).mean(axis=1)
+    
+    return signal, sample_rate
+
+
+def _copy_result(result: Dict) -> Dict:
+    """Copy a cached result so callers can't mutate the cached attributes."""
+    return {"emotion": result["emotion"], "attributes": dict(result["attributes"])}
+
 
 class EmotionDetectionService:
     """Service for detecting emotion from audio using OpenSmile."""
@@ -18,6 +161,18 @@ class EmotionDetectionService:
         """Initialize OpenSmile emotion detection service."""
         logger.info("=" * 60)
         logger.info("Initializing EmotionDetectionService...")
+        # Bound concurrent feature extractions to avoid oversubscribing cores
+        self._semaphore = asyncio.Semaphore(
+            settings.EMOTION_CONCURRENCY or max(2, (os.cpu_count() or 2) // 2)
+        )
+        # Repeated audio (retries, duplicate chunks) skips extraction entirely;
+        # per-key locks make concurrent duplicates wait for the first result
+        self._cache = LRUCache(
+            max_entries=settings.EMOTION_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.EMOTION_CACHE_TTL,
+        )
+        self._key_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self._feature_idx = None
         try:
             import opensmile
             logger.info("OpenSmile library imported successfully")
@@ -26,22 +181,51 @@ class EmotionDetectionService:
             self.smile = opensmile.Smile(
                 feature_set=opensmile.FeatureSet.eGeMAPSv02,
                 feature_level=opensmile.FeatureLevel.Functionals,
-                num_workers=2,  # Parallel processing
+                # Single utterances are too short to amortize a worker pool;
+                # concurrency comes from parallel requests instead
+                num_workers=1,
             )
+            # Column positions are fixed by the feature set, so resolve them
+            # once instead of looking up names in every result frame
+            feature_names = list(self.smile.feature_names)
+            self._feature_idx = np.array([feature_names.index(name) for name in _ATTRIBUTE_FEATURES])
             self.opensmile_available = True
             logger.info("✓ OpenSmile initialized successfully - REAL MODEL ACTIVE")
-            logger.info(f"Feature set: eGeMAPSv02, Level: Functionals, Workers: 2")
+            logger.info("Feature set: eGeMAPSv02, Level: Functionals, Workers: 1")
         except ImportError as e:
             logger.warning("✗ OpenSmile not available, using mock emotion detection")
-            logger.warning(f"Import error: {e}")
+            logger.warning("Import error: %s", e)
             self.smile = None
             self.opensmile_available = False
         except Exception as e:
-            logger.error(f"✗ Failed to initialize OpenSmile: {e}")
+            logger.error("✗ Failed to initialize OpenSmile: %s", e)
             self.smile = None
             self.opensmile_available = False
         logger.info("=" * 60)
     
+    def warmup(self) -> None:
+        """
+        Run one extraction on a second of silence (blocking).
+        
+        Primes OpenSmile's lazily allocated buffers so the first real request
+        doesn't pay for them. Failures are logged, never raised.
+        """
+        if self.smile is None:
+            return
+        
+        try:
+            self.smile.process_signal(np.zeros(16000, dtype=np.float32), 16000)
+            logger.info("✓ OpenSmile warmed up")
+        except Exception as e:
+            logger.warning("OpenSmile warm-up failed: %s", e)
+    
+    def _key_lock(self, cache_key: str) -> asyncio.Lock:
+        """Get the lock serializing detection of one audio content."""
+        lock = self._key_locks.get(cache_key)
+        if lock is None:
+            lock = self._key_locks[cache_key] = asyncio.Lock()
+        return lock
+    
     async def detect_emotion(self, audio_data: bytes, filename: str = "audio.wav") -> Dict:
         """
         Detect emotion from audio data.
@@ -51,109 +235,331 @@ class EmotionDetectionService:
             filename: Original filename (for extension detection)
         
         Returns:
-            Dictionary with 'emotion' and 'attributes' keys
+            Dictionary with 'emotion' and 'attributes' keys; a neutral result
+            returned because processing failed also has 'fallback': True
         
         Raises:
             Exception: If emotion detection fails
         """
-        logger.info(f"[DETECT_EMOTION] Starting emotion detection for file: {filename}")
-        logger.info(f"[DETECT_EMOTION] Audio data size: {len(audio_data)} bytes")
-        logger.info(f"[DETECT_EMOTION] OpenSmile available: {self.opensmile_available}")
+        logger.debug("[DETECT_EMOTION] Starting emotion detection for file: %s", filename)
+        logger.debug("[DETECT_EMOTION] Audio data size: %d bytes", len(audio_data))
+        logger.debug("[DETECT_EMOTION] OpenSmile available: %s", self.opensmile_available)
         
         if self.smile is None:
             # Fallback to mock emotion detection
             logger.warning("⚠ OpenSmile not available, using MOCK detection (not real model)")
             return await self._mock_emotion_detection(audio_data)
         
-        temp_path = None
-        
-        try:
-            # Save audio to temporary file (OpenSmile supports MP3, WAV, etc.)
-            suffix = Path(filename).suffix.lower() or ".wav"
+        cache_key = hashlib.blake2b(audio_data, digest_size=16).hexdigest()
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            logger.debug("[DETECT_EMOTION] Cache hit: %s", cache_key)
+            return _copy_result(cached)
+        
+        # Results persisted by this or an earlier process survive restarts.
+        # Redis I/O stays outside the per-key lock so a slow Redis never
+        # holds up waiters on the same audio
+        redis_key = f"cache/emotion:{cache_key}"
+        persisted = await redis_client.get_json(redis_key)
+        if persisted is not None:
+            logger.debug("[DETECT_EMOTION] Redis hit: %s", redis_key)
+            self._cache.set(cache_key, persisted)
+            return _copy_result(persisted)
+        
+        async with self._key_lock(cache_key):
+            # A concurrent request for the same audio may have just finished
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                logger.debug("[DETECT_EMOTION] Cache hit after wait: %s", cache_key)
+                return _copy_result(cached)
             
-            # Create temp file without automatic deletion (Windows compatibility)
-            # Use buffered write for better performance
-            temp_fd, temp_path = tempfile.mkstemp(suffix=suffix)
             try:
-                # Write audio data in chunks for large files
-                chunk_size = 8192
-                for i in range(0, len(audio_data), chunk_size):
-                    os.write(temp_fd, audio_data[i:i+chunk_size])
-                os.close(temp_fd)
+                # Decoding and extraction are blocking native calls: run them off
+                # the event loop, bounded so concurrent requests don't thrash the CPU
+                async with self._semaphore:
+                    features = await run_cpu_bound(self._extract_features, audio_data, filename)
                 
-                # Verify file exists and is readable
-                if not os.path.exists(temp_path):
-                    raise FileNotFoundError(f"Temporary file not found: {temp_path}")
+                logger.debug("[OPENSMILE] ✓ Feature extraction completed")
+                logger.debug("[OPENSMILE] Features shape: %s", getattr(features, "shape", None))
                 
-                file_size = os.path.getsize(temp_path)
-                if file_size == 0:
-                    raise ValueError(f"Temporary file is empty: {temp_path}")
+                if features is None or features.empty:
+                    raise ValueError("OpenSmile returned empty features")
                 
-                logger.info(f"[OPENSMILE] Processing audio file: {temp_path} (size: {file_size} bytes)")
-                logger.info(f"[OPENSMILE] Calling OpenSmile.process_file() - REAL MODEL EXTRACTION")
+                # Extract key emotional attributes
+                logger.debug("[PROCESSING] Extracting emotional attributes from OpenSmile features")
+                attributes = self._extract_emotional_attributes(features)
                 
-                # Extract features using OpenSmile (supports MP3, WAV, FLAC, etc.)
-                features = self.smile.process_file(temp_path)
+                # Classify emotion based on attributes
+                emotion = self._classify_emotion(attributes)
                 
-                logger.info(f"[OPENSMILE] ✓ Feature extraction completed")
-                logger.info(f"[OPENSMILE] Features shape: {features.shape if features is not None else 'None'}")
-            except:
-                # Close fd if still open
-                try:
-                    os.close(temp_fd)
-                except:
-                    pass
-                raise
-            
-            if features is None or features.empty:
-                raise ValueError("OpenSmile returned empty features")
-            
-            # Extract key emotional attributes
-            logger.info(f"[PROCESSING] Extracting emotional attributes from OpenSmile features")
-            attributes = self._extract_emotional_attributes(features)
-            logger.info(f"[PROCESSING] Extracted attributes: {attributes}")
-            
-            # Classify emotion based on attributes
-            logger.info(f"[CLASSIFICATION] Classifying emotion based on attributes")
-            emotion = self._classify_emotion(attributes)
-            logger.info(f"[CLASSIFICATION] ✓ Classified as: {emotion}")
+                logger.info(
+                    "Emotion detected: %s (pitch: %.2f, energy: %.2f, rate: %.2f)",
+                    emotion,
+                    attributes["pitch_mean"],
+                    attributes["energy"],
+                    attributes["speaking_rate"],
+                )
+                
+                result = {
+                    "emotion": emotion,
+                    "attributes": attributes,
+                }
+                self._cache.set(cache_key, result)
             
-            logger.info(f"Emotion detected: {emotion} (pitch: {attributes.get('pitch_mean', 0):.2f}, energy: {attributes.get('energy', 0):.2f}, rate: {attributes.get('speaking_rate', 0):.2f})")
-            logger.debug(f"Full attributes: {attributes}")
+            except Exception as e:
+                error_msg = str(e)
+                logger.error("Emotion detection error: %s", error_msg, exc_info=True)
+                
+                # Check for missing dependencies
+                if "mediainfo" in error_msg.lower():
+                    logger.error("Missing mediainfo dependency. Install with: choco install mediainfo (Windows) or apt-get install mediainfo (Linux)")
+                    raise Exception("MediaInfo is required for MP3 processing. Please install it: https://mediaarea.net/en/MediaInfo/Download/Windows")
+                
+                # Return neutral on other errors, flagged so callers don't
+                # cache it as a real detection
+                logger.warning("Returning neutral emotion due to processing error")
+                return {
+                    "emotion": "neutral",
+                    "attributes": dict(NEUTRAL_ATTRIBUTES),
+                    "fallback": True,
+                }
+        
+        await redis_client.set_json(redis_key, result, ttl=settings.EMOTION_REDIS_TTL)
+        return _copy_result(result)
+    
+    async def detect_emotions_batch(
+        self,
+        clips: List[bytes],
+        filenames: Optional[List[str]] = None,
+    ) -> List[Dict]:
+        """
+        Detect emotion for several clips with one dispatch to the CPU pool.
+        
+        Each distinct clip goes through the same in-memory cache, Redis and
+        per-key lock as detect_emotion. The clips still missing are
+        extracted back to back in a single worker job and classified
+        together with classify_batch. Clips that fail to process come back
+        neutral, flagged with 'fallback': True as in detect_emotion.
+        
+        Args:
+            clips: Binary audio data per clip
+            filenames: Original filenames (for extension detection), one per clip
+        
+        Returns:
+            Dictionary with 'emotion' and 'attributes' keys per clip, in order
+        
+        Raises:
+            ValueError: If filenames doesn't have one entry per clip
+        """
+        if filenames is None:
+            filenames = ["audio.wav"] * len(clips)
+        elif len(filenames) != len(clips):
+            raise ValueError(f"Expected one filename per clip, got {len(filenames)} for {len(clips)} clips")
+        
+        if self.smile is None:
+            logger.warning("⚠ OpenSmile not available, using MOCK detection (not real model)")
+            return [await self._mock_emotion_detection(clip) for clip in clips]
+        
+        results: List[Optional[Dict]] = [None] * len(clips)
+        
+        # Distinct content -> its slots, so duplicate clips are detected once
+        missing: Dict[str, List[int]] = {}
+        for i, clip in enumerate(clips):
+            cache_key = hashlib.blake2b(clip, digest_size=16).hexdigest()
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                results[i] = _copy_result(cached)
+            else:
+                missing.setdefault(cache_key, []).append(i)
+        
+        if missing:
+            persisted = await asyncio.gather(*(
+                redis_client.get_json(f"cache/emotion:{cache_key}") for cache_key in missing
+            ))
+            for cache_key, result in zip(list(missing), persisted):
+                if result is not None:
+                    self._cache.set(cache_key, result)
+                    for i in missing.pop(cache_key):
+                        results[i] = _copy_result(result)
+        
+        fresh: Dict[str, Dict] = {}
+        if missing:
+            async with contextlib.AsyncExitStack() as stack:
+                # A fixed order keeps batches sharing clips from deadlocking
+                for cache_key in sorted(missing):
+                    await stack.enter_async_context(self._key_lock(cache_key))
+                
+                # Concurrent detections may have finished while we waited
+                pending = []
+                for cache_key, slots in missing.items():
+                    cached = self._cache.get(cache_key)
+                    if cached is not None:
+                        for i in slots:
+                            results[i] = _copy_result(cached)
+                    else:
+                        pending.append(cache_key)
+                
+                if pending:
+                    async with self._semaphore:
+                        attributes = await run_cpu_bound(
+                            self._extract_attributes_batch,
+                            [clips[missing[cache_key][0]] for cache_key in pending],
+                            [filenames[missing[cache_key][0]] for cache_key in pending],
+                        )
+                    
+                    extracted = [(key, attrs) for key, attrs in zip(pending, attributes) if attrs is not None]
+                    if extracted:
+                        rows = np.array([[attrs[name] for name in _ATTRIBUTE_NAMES] for _, attrs in extracted])
+                        for (cache_key, attrs), emotion in zip(extracted, self.classify_batch(rows)):
+                            result = {"emotion": emotion, "attributes": attrs}
+                            self._cache.set(cache_key, result)
+                            fresh[cache_key] = result
             
-            return {
-                "emotion": emotion,
-                "attributes": attributes,
-            }
+            for cache_key, result in fresh.items():
+                for i in missing[cache_key]:
+                    results[i] = _copy_result(result)
+            await asyncio.gather(*(
+                redis_client.set_json(f"cache/emotion:{cache_key}", result, ttl=settings.EMOTION_REDIS_TTL)
+                for cache_key, result in fresh.items()
+            ))
+        
+        logger.info("Emotion detected for %d clips (%d extracted)", len(clips), len(fresh))
+        
+        return [
+            result if result is not None
+            else {"emotion": "neutral", "attributes": dict(NEUTRAL_ATTRIBUTES), "fallback": True}
+            for result in results
+        ]
+    
+    def _extract_attributes_batch(self, clips: List[bytes], filenames: List[str]) -> List[Optional[Dict[str, float]]]:
+        """
+        Extract normalized attributes for several clips (blocking).
+        
+        Each clip gets its own process_signal call; functionals summarize the
+        whole signal, so clips can't be concatenated into one extraction.
         
+        Args:
+            clips: Binary audio data per clip
+            filenames: Original filenames (for extension detection)
+        
+        Returns:
+            Attributes per clip, or None for clips that failed to process
+        """
+        attributes = []
+        for clip, filename in zip(clips, filenames):
+            try:
+                features = self._extract_features(clip, filename)
+                if features is None or features.empty:
+                    raise ValueError("OpenSmile returned empty features")
+                attributes.append(self._extract_emotional_attributes(features))
+            except Exception as e:
+                logger.warning("Emotion detection failed for %s: %s", filename, e)
+                attributes.append(None)
+        return attributes
+    
+    def _extract_features(self, audio_data: bytes, filename: str):
+        """
+        Decode audio and run OpenSmile feature extraction (blocking).
+        
+        Args:
+            audio_data: Binary audio data
+            filename: Original filename (for extension detection)
+        
+        Returns:
+            OpenSmile feature dataframe
+        """
+        # Sniff the container once so the decoder doesn't have to guess
+        audio_format = sniff_audio_format(audio_data)
+        logger.debug("[DETECT_EMOTION] Sniffed format: %s", audio_format or "unknown")
+        
+        # Decode in memory when possible to skip the temp-file round-trip
+        decoded = None
+        if audio_format not in _FILE_ONLY_FORMATS:
+            decoded = self._decode_signal(audio_data)
+        if decoded is not None:
+            signal, sampling_rate = decoded
+            logger.debug("[OPENSMILE] Processing in-memory signal (%d samples @ %d Hz)", len(signal), sampling_rate)
+            return self.smile.process_signal(signal, sampling_rate)
+        
+        return self._process_temp_file(audio_data, filename, audio_format)
+    
+    def _decode_signal(self, audio_data: bytes) -> Optional[Tuple[np.ndarray, int]]:
+        """
+        Decode audio bytes in memory for OpenSmile's process_signal.
+        
+        Args:
+            audio_data: Binary audio data
+        
+        Returns:
+            Tuple of (mono float32 signal, sampling rate), or None if the
+            format cannot be decoded without going through a file
+        """
+        # Fast path: already PCM16 WAV, no decoder needed
+        decoded = _decode_pcm16_wav(audio_data)
+        if decoded is not None:
+            return decoded
+        
+        if sf is None:
+            return None
+        
+        try:
+            signal, sampling_rate = sf.read(io.BytesIO(audio_data), dtype="float32", always_2d=False)
         except Exception as e:
-            error_msg = str(e)
-            logger.error(f"Emotion detection error: {error_msg}", exc_info=True)
+            logger.debug("In-memory decode unavailable, falling back to temp file: %s", e)
+            return None
+        
+        # Collapse multi-channel audio to mono
+        if signal.ndim > 1:
+            signal = signal.mean(axis=1)
+        
+        return signal, sampling_rate
+    
+    def _process_temp_file(self, audio_data: bytes, filename: str, audio_format: Optional[str] = None):
+        """
+        Extract features by writing audio to a temporary file.
+        
+        Used for containers that cannot be decoded in memory (e.g. m4a, webm);
+        OpenSmile decodes these through MediaInfo/ffmpeg.
+        
+        Args:
+            audio_data: Binary audio data
+            filename: Original filename (extension used if format is unknown)
+            audio_format: Sniffed container format
+        
+        Returns:
+            OpenSmile feature dataframe
+        """
+        if not audio_data:
+            raise ValueError("Audio data is empty")
+        
+        # Trust the content over the client-supplied filename
+        suffix = _FORMAT_SUFFIXES.get(audio_format) or Path(filename).suffix.lower() or ".wav"
+        
+        # Create temp file without automatic deletion (Windows compatibility)
+        temp_dir = _SHM_DIR if len(audio_data) <= _SHM_MAX_BYTES else None
+        temp_fd, temp_path = tempfile.mkstemp(suffix=suffix, dir=temp_dir)
+        try:
+            try:
+                # Write the whole buffer at once; loop only for short writes
+                view = memoryview(audio_data)
+                while view:
+                    view = view[os.write(temp_fd, view):]
+            finally:
+                os.close(temp_fd)
             
-            # Check for missing dependencies
-            if "mediainfo" in error_msg.lower():
-                logger.error("Missing mediainfo dependency. Install with: choco install mediainfo (Windows) or apt-get install mediainfo (Linux)")
-                raise Exception("MediaInfo is required for MP3 processing. Please install it: https://mediaarea.net/en/MediaInfo/Download/Windows")
+            logger.debug("[OPENSMILE] Processing audio file: %s (size: %d bytes)", temp_path, len(audio_data))
             
-            # Return neutral on other errors
-            logger.warning("Returning neutral emotion due to processing error")
-            return {
-                "emotion": "neutral",
-                "attributes": {
-                    "pitch_mean": 0.5,
-                    "energy": 0.5,
-                    "speaking_rate": 0.5,
-                },
-            }
+            # Extract features using OpenSmile (supports MP3, WAV, FLAC, etc.)
+            return self.smile.process_file(temp_path)
         
         finally:
             # Clean up temporary file
-            if temp_path and os.path.exists(temp_path):
+            if os.path.exists(temp_path):
                 try:
                     os.unlink(temp_path)
-                    logger.debug(f"Cleaned up temp file: {temp_path}")
+                    logger.debug("Cleaned up temp file: %s", temp_path)
                 except Exception as e:
-                    logger.warning(f"Failed to delete temp file {temp_path}: {e}")
+                    logger.warning("Failed to delete temp file %s: %s", temp_path, e)
     
     def _extract_emotional_attributes(self, features) -> Dict[str, float]:
         """
@@ -165,26 +571,15 @@ class EmotionDetectionService:
         Returns:
             Dictionary of normalized attributes (0-1 range)
         """
-        import numpy as np
-        
-        # Convert to dict and get first row (for functionals)
-        feature_dict = features.iloc[0].to_dict()
+        # Read the key features straight from the first row (for functionals)
+        raw = features.to_numpy()[0, self._feature_idx]
         
-        # Extract key features
-        pitch_mean = feature_dict.get("F0semitoneFrom27.5Hz_sma3nz_amean", 0)
-        energy_mean = feature_dict.get("loudness_sma3_amean", 0)
-        speaking_rate = feature_dict.get("loudness_sma3_percentile20.0", 0)
+        logger.debug("[FEATURES] Raw pitch: %s, energy: %s, rate: %s", *raw)
         
-        logger.debug(f"[FEATURES] Raw pitch: {pitch_mean}, energy: {energy_mean}, rate: {speaking_rate}")
+        # Normalize all three at once to the 0-1 range
+        normalized = np.clip((raw + _ATTRIBUTE_OFFSETS) / _ATTRIBUTE_SCALES, 0.0, 1.0)
         
-        # Normalize to 0-1 range (rough estimates)
-        attributes = {
-            "pitch_mean": np.clip((pitch_mean + 100) / 200, 0, 1),
-            "energy": np.clip((energy_mean + 40) / 80, 0, 1),
-            "speaking_rate": np.clip((speaking_rate + 40) / 80, 0, 1),
-        }
-        
-        return attributes
+        return dict(zip(_ATTRIBUTE_NAMES, normalized.tolist()))
     
     def _classify_emotion(self, attributes: Dict[str, float]) -> str:
         """
@@ -200,78 +595,102 @@ class EmotionDetectionService:
         energy = attributes.get("energy", 0.5)
         speaking_rate = attributes.get("speaking_rate", 0.5)
         
-        logger.debug(f"[CLASSIFY] Analyzing: pitch={pitch:.3f}, energy={energy:.3f}, rate={speaking_rate:.3f}")
+        logger.debug("[CLASSIFY] Analyzing: pitch=%.3f, energy=%.3f, rate=%.3f", pitch, energy, speaking_rate)
         
         # Score-based classification for better accuracy
         # Calculate scores for each emotion based on multiple factors
         
-        scores = {
-            "neutral": 0,
-            "angry": 0,
-            "happy": 0,
-            "sad": 0,
-            "surprised": 0
-        }
+        neutral = angry = happy = sad = surprised = 0
         
         # ANGRY scoring: High pitch + high energy + potentially fast rate
         if pitch > 0.65 and energy > 0.55:
-            scores["angry"] += 3  # Strong indicator
+            angry += 3  # Strong indicator
         if pitch > 0.62 and energy > 0.52:
-            scores["angry"] += 2  # Moderate indicator
+            angry += 2  # Moderate indicator
         if energy > 0.75:
-            scores["angry"] += 2  # Very high energy
+            angry += 2  # Very high energy
         if pitch > 0.7 and speaking_rate > 0.55:
-            scores["angry"] += 1  # Fast aggressive speech
+            angry += 1  # Fast aggressive speech
         
         # HAPPY scoring: Moderate-high pitch + moderate energy + faster rate
         if 0.55 < pitch < 0.68 and 0.48 < energy < 0.62 and speaking_rate > 0.52:
-            scores["happy"] += 3  # Balanced positive
+            happy += 3  # Balanced positive
         if 0.58 < pitch < 0.65 and energy > 0.5:
-            scores["happy"] += 2  # Pleasant tone
+            happy += 2  # Pleasant tone
         if speaking_rate > 0.58 and energy > 0.48:
-            scores["happy"] += 1  # Energetic speech
+            happy += 1  # Energetic speech
         
         # SURPRISED scoring: Very high pitch with moderate energy
         if pitch > 0.78:
-            scores["surprised"] += 3  # Very high pitch
+            surprised += 3  # Very high pitch
         if pitch > 0.72 and energy < 0.65:
-            scores["surprised"] += 2  # High pitch, not too loud
+            surprised += 2  # High pitch, not too loud
         if pitch > 0.75 and 0.45 < energy < 0.6:
-            scores["surprised"] += 1  # Startled pattern
+            surprised += 1  # Startled pattern
         
         # SAD scoring: Low pitch + low energy + slow rate
         if pitch < 0.42 and energy < 0.42:
-            scores["sad"] += 3  # Strong sad indicator
+            sad += 3  # Strong sad indicator
         if pitch < 0.48 and energy < 0.48:
-            scores["sad"] += 2  # Moderate sad indicator
+            sad += 2  # Moderate sad indicator
         if energy < 0.38:
-            scores["sad"] += 2  # Very low energy
+            sad += 2  # Very low energy
         if speaking_rate < 0.45 and energy < 0.5:
-            scores["sad"] += 1  # Slow, low energy
+            sad += 1  # Slow, low energy
         
         # NEUTRAL scoring: Moderate values across all attributes
         if 0.45 <= pitch <= 0.62 and 0.42 <= energy <= 0.58:
-            scores["neutral"] += 2  # Balanced moderate values
+            neutral += 2  # Balanced moderate values
         if 0.48 <= speaking_rate <= 0.55:
-            scores["neutral"] += 1  # Normal speaking rate
+            neutral += 1  # Normal speaking rate
+        
+        # Find emotion with highest score (ties keep this order)
+        scores = (neutral, angry, happy, sad, surprised)
+        best = max(range(len(scores)), key=scores.__getitem__)
+        max_score = scores[best]
         
-        # Find emotion with highest score
-        max_score = max(scores.values())
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[CLASSIFY] Scores: %s", dict(zip(_EMOTIONS, scores)))
         
         # Require minimum score of 2 to classify as non-neutral
         if max_score < 2:
-            logger.debug(f"[CLASSIFY] All scores too low, defaulting to NEUTRAL")
-            logger.debug(f"[CLASSIFY] Scores: {scores}")
+            logger.debug("[CLASSIFY] All scores too low, defaulting to NEUTRAL")
             return "neutral"
         
-        # Get emotion with highest score
-        detected_emotion = max(scores, key=scores.get)
-        
-        logger.debug(f"[CLASSIFY] Scores: {scores}")
-        logger.debug(f"[CLASSIFY] Detected: {detected_emotion.upper()} (score: {max_score})")
+        detected_emotion = _EMOTIONS[best]
+        logger.debug("[CLASSIFY] Detected: %s (score: %d)", detected_emotion.upper(), max_score)
         
         return detected_emotion
     
+    def classify_batch(self, attributes: np.ndarray) -> List[str]:
+        """
+        Classify many attribute rows at once with the same rules as _classify_emotion.
+        
+        Args:
+            attributes: Array of shape (N, 3) with normalized pitch_mean,
+                energy and speaking_rate columns
+        
+        Returns:
+            Emotion label per row
+        """
+        attributes = np.asarray(attributes, dtype=np.float64).reshape(-1, 3)
+        
+        # Evaluate every rule on every row at once: (N, n_rules, 3) comparisons
+        values = attributes[:, None, :]
+        open_match = ((values > _RULE_LO) & (values < _RULE_HI)).all(axis=2)
+        closed_match = ((values >= _RULE_LO) & (values <= _RULE_HI)).all(axis=2)
+        matched = np.where(_RULE_CLOSED, closed_match, open_match)
+        
+        # Sum matched rule weights per emotion: (N, n_emotions)
+        scores = matched.astype(np.int16) @ _RULE_WEIGHTS
+        
+        # argmax keeps the first maximum, matching the scalar tie order;
+        # rows without a score of at least 2 fall back to neutral
+        best = scores.argmax(axis=1)
+        best[scores.max(axis=1, initial=0) < 2] = 0
+        
+        return [_EMOTIONS[i] for i in best.tolist()]
+    
     async def _mock_emotion_detection(self, audio_data: bytes) -> Dict:
         """
         Mock emotion detection when OpenSmile is not available.
@@ -282,18 +701,17 @@ class EmotionDetectionService:
         Returns:
             Mock emotion data
         """
-        import hashlib
-        
-        # Use audio hash to generate consistent mock data
-        audio_hash = hashlib.md5(audio_data).hexdigest()
-        hash_val = int(audio_hash[:8], 16) / (16**8)
+        # Use a hash of the first 64 KiB to generate consistent mock data;
+        # only 32 bits of entropy are needed, so the rest isn't scanned
+        digest = hashlib.blake2b(memoryview(audio_data)[:65536], digest_size=4).digest()
+        hash_val = int.from_bytes(digest, "big") / 2**32
         
         emotions = ["happy", "sad", "angry", "neutral", "surprised"]
         emotion_idx = int(hash_val * len(emotions))
         emotion = emotions[emotion_idx]
         
-        logger.warning(f"⚠ MOCK DETECTION USED (not real model): {emotion}")
-        logger.warning(f"⚠ Install OpenSmile to use real emotion detection")
+        logger.warning("⚠ MOCK DETECTION USED (not real model): %s", emotion)
+        logger.debug("⚠ Install OpenSmile to use real emotion detection")
         
         return {
             "emotion": emotion,
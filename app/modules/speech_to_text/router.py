@@ -4,7 +4,7 @@ Router for speech-to-text endpoints.
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from pydantic import BaseModel
 from app.modules.speech_to_text.service import speech_to_text_service
-from app.core.utils import validate_audio_file
+from app.core.utils import validate_audio_file, read_audio_file
 
 router = APIRouter(prefix="/speech-to-text", tags=["Speech-to-Text"])
 
@@ -29,19 +29,23 @@ async def transcribe(audio: UploadFile = File(...)):
     """
     try:
         # Validate audio file
-        validate_audio_file(audio)
+        mimetype = validate_audio_file(audio)
         
-        # Read audio data
-        audio_data = await audio.read()
+        # Read audio data in chunks, rejecting oversized uploads early
+        audio_data = await read_audio_file(audio)
         
         # Transcribe
         result = await speech_to_text_service.transcribe_audio(
             audio_data,
-            mimetype=audio.content_type or "audio/wav"
+            mimetype=mimetype
         )
         
         return result
     
+    except HTTPException:
+        # Keep validation/size errors (400/413) as-is
+        raise
+    
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -6,11 +6,30 @@ import logging
 import httpx
 import httpcore
 import asyncio
+import orjson
 from typing import Dict
+from urllib.parse import urlencode
 from app.core.config import settings
+from app.core.http_client import http_client
 
 logger = logging.getLogger(__name__)
 
+# Map language codes
+_LANGUAGE_NAMES = {
+    "en": "English",
+    "es": "Spanish",
+}
+
+# Deepgram parameters for language detection and transcription
+_TRANSCRIBE_PARAMS = {
+    "detect_language": "true",
+    "model": "nova-2",  # Fast and accurate model
+    "smart_format": "true",
+    "punctuate": "true",
+    "diarize": "false",  # Disable diarization for speed
+    "utterances": "false",  # Disable utterances for speed
+}
+
 
 class SpeechToTextService:
     """Service for transcribing audio using Deepgram API."""
@@ -18,24 +37,32 @@ class SpeechToTextService:
     def __init__(self):
         self.api_key = settings.DEEPGRAM_API_KEY
         self.base_url = settings.DEEPGRAM_API_URL
-        self._client = None
+        # The query string never changes, so encode it once
+        self._transcribe_url = f"{self.base_url}?{urlencode(_TRANSCRIBE_PARAMS)}"
+        # Cap in-flight Deepgram requests; held per attempt, not across backoff
+        self._semaphore = asyncio.Semaphore(settings.STT_CONCURRENCY)
     
     async def _get_client(self):
-        """Get or create reusable HTTP client with optimized settings."""
-        if self._client is None:
-            self._client = httpx.AsyncClient(
-                timeout=httpx.Timeout(30.0, connect=5.0),
-                limits=httpx.Limits(max_keepalive_connections=5, max_connections=10),
-                http2=True  # Enable HTTP/2 for better performance
-            )
-        return self._client
+        """Get the HTTP client shared across upstream services."""
+        return http_client.get_client()
     
-    async def _reset_client(self):
-        """Reset the HTTP client to handle stale connections."""
-        if self._client is not None:
-            await self._client.aclose()
-            self._client = None
-        logger.info("HTTP client reset due to connection error")
+    async def warmup(self) -> None:
+        """
+        Open a pooled connection to Deepgram ahead of the first request.
+        
+        Sends a bare HEAD so the TLS handshake and HTTP/2 setup are done by
+        the time a transcription arrives. The status is irrelevant; failures
+        are logged, never raised.
+        """
+        if not self.api_key:
+            return
+        
+        try:
+            client = await self._get_client()
+            await client.head(self.base_url, headers={"Authorization": f"Token {self.api_key}"})
+            logger.info("[DEEPGRAM] ✓ Connection warmed up")
+        except Exception as e:
+            logger.warning("[DEEPGRAM] Connection warm-up failed: %s", e)
     
     async def transcribe_audio(self, audio_data: bytes, mimetype: str = "audio/wav") -> Dict[str, str]:
         """
@@ -58,17 +85,16 @@ class SpeechToTextService:
             try:
                 return await self._transcribe_with_retry(audio_data, mimetype, attempt)
             except (httpcore.ConnectionNotAvailable, httpcore.RemoteProtocolError) as e:
-                logger.warning(f"Connection error on attempt {attempt + 1}/{max_retries}: {type(e).__name__}")
-                
-                # Reset client on connection errors
-                await self._reset_client()
+                logger.warning("Connection error on attempt %d/%d: %s", attempt + 1, max_retries, type(e).__name__)
                 
+                # httpx drops the broken connection from the shared pool, so
+                # the retry opens a fresh one without disturbing other requests
                 if attempt < max_retries - 1:
                     wait_time = retry_delay * (2 ** attempt)  # Exponential backoff
-                    logger.info(f"Retrying in {wait_time:.1f} seconds...")
+                    logger.info("Retrying in %.1f seconds...", wait_time)
                     await asyncio.sleep(wait_time)
                 else:
-                    logger.error(f"All {max_retries} attempts failed")
+                    logger.error("All %d attempts failed", max_retries)
                     raise Exception(f"Connection to Deepgram failed after {max_retries} attempts. Please try again.")
             except Exception as e:
                 # For non-connection errors, don't retry
@@ -92,25 +118,15 @@ class SpeechToTextService:
                 "Content-Type": mimetype,
             }
             
-            # Deepgram parameters for language detection and transcription
-            params = {
-                "detect_language": "true",
-                "model": "nova-2",  # Fast and accurate model
-                "smart_format": "true",
-                "punctuate": "true",
-                "diarize": "false",  # Disable diarization for speed
-                "utterances": "false",  # Disable utterances for speed
-            }
-            
             client = await self._get_client()
-            response = await client.post(
-                self.base_url,
-                headers=headers,
-                params=params,
-                content=audio_data,
-            )
+            async with self._semaphore:
+                response = await client.post(
+                    self._transcribe_url,
+                    headers=headers,
+                    content=audio_data,
+                )
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
             
             # Extract transcription and detected language
             results = data.get("results", {})
@@ -126,19 +142,12 @@ class SpeechToTextService:
             transcript = alternatives[0].get("transcript", "")
             detected_language = channels[0].get("detected_language", "en")
             
-            # Map language codes
-            language_map = {
-                "en": "English",
-                "es": "Spanish",
-            }
-            
             # Extract base language code (2-letter code)
             language_code = detected_language.lower()[:2]
-            language_name = language_map.get(language_code, "English")
+            language_name = _LANGUAGE_NAMES.get(language_code, "English")
             
-            logger.info(f"[DEEPGRAM] Transcription successful")
-            logger.info(f"[DEEPGRAM] Detected language: {language_name} ({language_code})")
-            logger.debug(f"[DEEPGRAM] Transcript: {transcript[:100]}...")
+            logger.info("[DEEPGRAM] Transcription successful (language: %s)", language_code)
+            logger.debug("[DEEPGRAM] Transcript: %.100s...", transcript)
             
             return {
                 "language": language_name,
@@ -148,8 +157,8 @@ class SpeechToTextService:
         
         except httpx.HTTPStatusError as e:
             error_detail = e.response.text if hasattr(e.response, 'text') else str(e)
-            logger.error(f"Deepgram API error: {e.response.status_code}")
-            logger.error(f"Response: {error_detail}")
+            logger.error("Deepgram API error: %s", e.response.status_code)
+            logger.error("Response: %s", error_detail)
             
             # Check for authentication errors
             if e.response.status_code == 401:
@@ -160,20 +169,13 @@ class SpeechToTextService:
                 raise Exception(f"Deepgram API error ({e.response.status_code}): {error_detail}")
         except (httpcore.ConnectionNotAvailable, httpcore.RemoteProtocolError) as e:
             # Re-raise connection errors to be handled by retry logic
-            logger.error(f"Connection error: {type(e).__name__} - {str(e)}")
+            logger.error("Connection error: %s - %s", type(e).__name__, e)
             raise
         except Exception as e:
             error_msg = str(e) if str(e) else "Unknown error occurred"
-            logger.error(f"Transcription error: {error_msg}")
+            logger.error("Transcription error: %s", error_msg)
             logger.exception("Full traceback:")
             raise Exception(error_msg)
-    
-    async def cleanup(self):
-        """Cleanup resources and close HTTP client."""
-        if self._client is not None:
-            await self._client.aclose()
-            self._client = None
-            logger.info("Speech-to-text service cleaned up")
 
 
 # Global service instance
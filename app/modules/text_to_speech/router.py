@@ -2,8 +2,8 @@
 Router for text-to-speech endpoints.
 """
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import Response
-from pydantic import BaseModel
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, ConfigDict
 from typing import Optional, Dict
 from app.modules.text_to_speech.service import text_to_speech_service
 
@@ -12,10 +12,14 @@ router = APIRouter(prefix="/text-to-speech", tags=["Text-to-Speech"])
 
 class TTSRequest(BaseModel):
     """Request model for text-to-speech."""
+    # Allow the model_id field despite pydantic's "model_" namespace
+    model_config = ConfigDict(protected_namespaces=())
+    
     text: str
     emotion: str = "neutral"
     emotion_attributes: Optional[Dict[str, float]] = None
     language_code: str = "en"
+    model_id: Optional[str] = None  # Defaults to ELEVENLABS_MODEL_ID
 
 
 @router.post("/generate")
@@ -35,6 +39,7 @@ async def generate_speech(request: TTSRequest):
             emotion=request.emotion,
             emotion_attributes=request.emotion_attributes,
             language_code=request.language_code,
+            model_id=request.model_id,
         )
         
         return Response(
@@ -49,6 +54,51 @@ async def generate_speech(request: TTSRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/stream")
+async def stream_speech(request: TTSRequest):
+    """
+    Stream speech from text as ElevenLabs renders it.
+    
+    The first chunk is fetched before responding, so upstream errors still
+    surface as an HTTP error instead of a truncated stream.
+    
+    Args:
+        request: TTS request with text, emotion, and attributes
+    
+    Returns:
+        Streamed audio (MP3)
+    """
+    stream = text_to_speech_service.generate_audio_stream(
+        text=request.text,
+        emotion=request.emotion,
+        emotion_attributes=request.emotion_attributes,
+        language_code=request.language_code,
+        model_id=request.model_id,
+    )
+    
+    try:
+        first_chunk = await anext(stream, b"")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    async def body():
+        try:
+            yield first_chunk
+            async for chunk in stream:
+                yield chunk
+        finally:
+            # Release the upstream connection if the client disconnects
+            await stream.aclose()
+    
+    return StreamingResponse(
+        body(),
+        media_type="audio/mpeg",
+        headers={
+            "Content-Disposition": "attachment; filename=speech.mp3"
+        }
+    )
+
+
 @router.get("/voices")
 async def get_voices():
     """
@@ -2,14 +2,75 @@
 Text-to-speech service using ElevenLabs API.
 Synthesizes emotional speech preserving detected emotion attributes.
 """
+import asyncio
 import logging
+import re
 import httpx
-from typing import Dict, Optional
+import orjson
+from typing import AsyncIterator, Dict, List, Optional
+from app.core.cache import LRUCache
 from app.core.config import settings
+from app.core.http_client import http_client, post_with_retry, retry_delay
 from app.core.utils import map_emotion_to_voice_settings
 
 logger = logging.getLogger(__name__)
 
+# Longer timeout for audio generation than the shared client default
+_GENERATE_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+
+# ElevenLabs reads the latency optimization level (0-4) from the query
+# string; it is ignored in the JSON body
+_LATENCY_PARAMS = {"optimize_streaming_latency": 3}
+
+# Read size for streamed audio; small enough to forward the first MP3 frames
+# as soon as ElevenLabs renders them
+_STREAM_CHUNK_SIZE = 8192
+
+# Preferred break points for splitting long text, strongest first:
+# paragraph, line, then sentence end
+_TEXT_BREAKS = (
+    re.compile(r"\n\s*\n"),
+    re.compile(r"\n"),
+    re.compile(r"(?<=[.!?])\s+"),
+    re.compile(r"\s+"),
+)
+
+
+def split_text(text: str, max_chars: int) -> List[str]:
+    """
+    Split text into chunks of at most max_chars at natural boundaries.
+    
+    Each chunk ends at the strongest break (paragraph, then line, then
+    sentence, then word) found in the second half of the allowed window, so
+    chunks stay close to max_chars without cutting mid-sentence. Text with no
+    break at all is cut hard.
+    
+    Args:
+        text: Text to split
+        max_chars: Maximum characters per chunk
+    
+    Returns:
+        Chunks in order (the text itself if it already fits)
+    """
+    if len(text) <= max_chars:
+        return [text]
+    
+    chunks = []
+    text = text.strip()
+    while len(text) > max_chars:
+        window = text[:max_chars + 1]
+        cut = end = max_chars
+        for pattern in _TEXT_BREAKS:
+            matches = [m for m in pattern.finditer(window) if m.start() >= max_chars // 2]
+            if matches:
+                cut, end = matches[-1].start(), matches[-1].end()
+                break
+        chunks.append(text[:cut].rstrip())
+        text = text[end:].lstrip()
+    if text:
+        chunks.append(text)
+    return chunks
+
 
 class TextToSpeechService:
     """Service for generating speech using ElevenLabs API."""
@@ -19,17 +80,44 @@ class TextToSpeechService:
         self.base_url = settings.ELEVENLABS_API_URL
         self.voice_id = settings.ELEVENLABS_VOICE_ID
         self.model_id = settings.ELEVENLABS_MODEL_ID
-        self._client = None
+        # Identical for every synthesis request, so build them once
+        self._generate_url = f"{self.base_url}/text-to-speech/{self.voice_id}"
+        self._stream_url = f"{self._generate_url}/stream"
+        self._headers = {
+            "xi-api-key": self.api_key,
+            "Content-Type": "application/json",
+            # MP3 is already compressed; don't let a gzip layer cost CPU
+            "Accept-Encoding": "identity",
+        }
+        # Repeated phrases (short replies, retries) skip synthesis entirely
+        self._cache = LRUCache(
+            max_entries=settings.TTS_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.TTS_CACHE_TTL,
+        )
+        # ElevenLabs enforces a per-plan concurrent request limit
+        self._semaphore = asyncio.Semaphore(settings.TTS_CONCURRENCY)
     
     async def _get_client(self):
-        """Get or create reusable HTTP client with optimized settings."""
-        if self._client is None:
-            self._client = httpx.AsyncClient(
-                timeout=httpx.Timeout(60.0, connect=10.0),  # Longer timeout for audio generation
-                limits=httpx.Limits(max_keepalive_connections=5, max_connections=10),
-                http2=True
-            )
-        return self._client
+        """Get the HTTP client shared across upstream services."""
+        return http_client.get_client()
+    
+    async def warmup(self) -> None:
+        """
+        Open a pooled connection to ElevenLabs ahead of the first request.
+        
+        Sends a bare HEAD to the voices endpoint so the TLS handshake and
+        HTTP/2 setup are done by the time synthesis is needed. Failures are
+        logged, never raised.
+        """
+        if not self.api_key:
+            return
+        
+        try:
+            client = await self._get_client()
+            await client.head(f"{self.base_url}/voices", headers={"xi-api-key": self.api_key})
+            logger.info("[ELEVENLABS] ✓ Connection warmed up")
+        except Exception as e:
+            logger.warning("[ELEVENLABS] Connection warm-up failed: %s", e)
     
     async def generate_audio(
         self,
@@ -37,6 +125,7 @@ class TextToSpeechService:
         emotion: str = "neutral",
         emotion_attributes: Optional[Dict] = None,
         language_code: str = "en",
+        model_id: Optional[str] = None,
     ) -> bytes:
         """
         Generate audio from text with emotion preservation.
@@ -46,6 +135,7 @@ class TextToSpeechService:
             emotion: Detected emotion (happy, sad, angry, neutral, surprised)
             emotion_attributes: Emotion attributes from detection
             language_code: Target language code
+            model_id: ElevenLabs model override (default from settings)
         
         Returns:
             Binary audio data (MP3)
@@ -54,10 +144,12 @@ class TextToSpeechService:
             Exception: If generation fails
         """
         try:
-            logger.info(f"[ELEVENLABS] Starting audio generation")
-            logger.info(f"[ELEVENLABS] Text length: {len(text)} characters")
-            logger.info(f"[ELEVENLABS] Target language: {language_code}")
-            logger.info(f"[ELEVENLABS] Emotion to preserve: {emotion}")
+            logger.debug(
+                "[ELEVENLABS] Starting audio generation (%d characters, language: %s, emotion: %s)",
+                len(text), language_code, emotion,
+            )
+            
+            model_id = model_id or self.model_id
             
             # Map emotion to voice settings
             voice_settings = map_emotion_to_voice_settings(
@@ -65,61 +157,274 @@ class TextToSpeechService:
                 emotion_attributes or {}
             )
             
-            logger.info(f"[ELEVENLABS] Voice settings mapped:")
-            logger.info(f"  - Stability: {voice_settings.get('stability', 0.5):.2f}")
-            logger.info(f"  - Similarity Boost: {voice_settings.get('similarity_boost', 0.75):.2f}")
-            logger.info(f"  - Style: {voice_settings.get('style', 0.0):.2f}")
-            logger.info(f"  - Use Speaker Boost: {voice_settings.get('use_speaker_boost', True)}")
+            logger.debug("[ELEVENLABS] Voice settings mapped: %s", voice_settings)
             
-            url = f"{self.base_url}/text-to-speech/{self.voice_id}"
+            # Long text is rendered as concurrent chunks with identical voice
+            # settings; MP3 frames concatenate into one playable stream
+            chunks = split_text(text, settings.TTS_CHUNK_MAX_CHARS)
+            if len(chunks) > 1:
+                logger.info("[ELEVENLABS] Synthesizing %d chunks concurrently", len(chunks))
             
-            headers = {
-                "xi-api-key": self.api_key,
-                "Content-Type": "application/json",
-            }
+            tasks = [
+                asyncio.ensure_future(self._synthesize(chunk, voice_settings, model_id))
+                for chunk in chunks
+            ]
+            try:
+                parts = await asyncio.gather(*tasks)
+            except BaseException:
+                # One failed chunk fails the clip; don't keep rendering the rest
+                for task in tasks:
+                    task.cancel()
+                raise
+            audio_data = parts[0] if len(parts) == 1 else b"".join(parts)
             
-            payload = {
-                "text": text,
-                "model_id": self.model_id,
-                "voice_settings": voice_settings,
-                "optimize_streaming_latency": 3,  # Optimize for lower latency (0-4)
-            }
-            
-            logger.info(f"[ELEVENLABS] Calling ElevenLabs API...")
-            logger.info(f"[ELEVENLABS] Model: {self.model_id}, Voice: {self.voice_id}")
-            
-            client = await self._get_client()
-            response = await client.post(
-                url,
-                headers=headers,
-                json=payload,
-            )
-            response.raise_for_status()
-            audio_data = response.content
-            
-            logger.info(f"[ELEVENLABS] ✓ Audio generation successful")
-            logger.info(f"[ELEVENLABS] Output size: {len(audio_data)} bytes")
-            logger.info(f"[ELEVENLABS] Emotion preserved: {emotion}")
+            logger.info("[ELEVENLABS] ✓ Audio generation successful (%d bytes, emotion: %s)", len(audio_data), emotion)
             
             return audio_data
         
         except httpx.HTTPStatusError as e:
-            error_detail = e.response.text if hasattr(e.response, 'text') else str(e)
-            logger.error(f"ElevenLabs API error: {e.response.status_code}")
-            logger.error(f"Response: {error_detail}")
-            
-            if e.response.status_code == 401:
-                raise Exception("Invalid ElevenLabs API key. Please check your ELEVENLABS_API_KEY in .env file")
-            elif e.response.status_code == 403:
-                raise Exception("ElevenLabs API access forbidden. Check your API key and quota")
-            else:
-                raise Exception(f"ElevenLabs API error ({e.response.status_code}): {error_detail}")
+            raise self._api_error(e)
         except Exception as e:
             error_msg = str(e) if str(e) else "Unknown audio generation error"
-            logger.error(f"Audio generation error: {error_msg}")
+            logger.error("Audio generation error: %s", error_msg)
             logger.exception("Full traceback:")
             raise Exception(error_msg)
     
+    async def _synthesize(self, text: str, voice_settings: Dict, model_id: str) -> bytes:
+        """
+        Synthesize one piece of text with the buffered endpoint.
+        
+        Args:
+            text: Text to synthesize (within the per-request size limit)
+            voice_settings: ElevenLabs voice settings
+            model_id: ElevenLabs model
+        
+        Returns:
+            Binary audio data (MP3)
+        
+        Raises:
+            httpx.HTTPStatusError: If ElevenLabs rejects the request
+        """
+        # Everything sent to ElevenLabs determines the output, so key on
+        # that rather than the raw emotion attributes
+        cache_key = (model_id, self.voice_id, text, tuple(voice_settings.items()))
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            logger.info("[ELEVENLABS] ✓ Cache hit, skipping synthesis (%d bytes)", len(cached))
+            return cached
+        
+        # orjson is much faster than httpx's stdlib json on the float-heavy
+        # voice settings; the Content-Type header is already set
+        body = orjson.dumps({
+            "text": text,
+            "model_id": model_id,
+            "voice_settings": voice_settings,
+        })
+        
+        logger.debug("[ELEVENLABS] Calling ElevenLabs API (model: %s, voice: %s)", model_id, self.voice_id)
+        
+        client = await self._get_client()
+        response = await post_with_retry(
+            client,
+            self._generate_url,
+            semaphore=self._semaphore,
+            headers=self._headers,
+            params=_LATENCY_PARAMS,
+            content=body,
+            timeout=_GENERATE_TIMEOUT,
+        )
+        audio_data = response.content
+        self._cache.set(cache_key, audio_data)
+        return audio_data
+    
+    async def generate_audio_stream(
+        self,
+        text: str,
+        emotion: str = "neutral",
+        emotion_attributes: Optional[Dict] = None,
+        language_code: str = "en",
+        model_id: Optional[str] = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Generate audio from text, yielding MP3 chunks as ElevenLabs renders them.
+        
+        Uses the streaming endpoint so callers can forward the first frames
+        before synthesis finishes. The assembled clip is cached like
+        generate_audio, and a cache hit is yielded as a single chunk. Text
+        too long for one request is synthesized as concurrent chunks, each
+        yielded in order as soon as it and every chunk before it are done.
+        
+        Args:
+            text: Text to synthesize
+            emotion: Detected emotion (happy, sad, angry, neutral, surprised)
+            emotion_attributes: Emotion attributes from detection
+            language_code: Target language code
+            model_id: ElevenLabs model override (default from settings)
+        
+        Yields:
+            Chunks of binary audio data (MP3)
+        
+        Raises:
+            Exception: If generation fails
+        """
+        model_id = model_id or self.model_id
+        voice_settings = map_emotion_to_voice_settings(emotion, emotion_attributes or {})
+        
+        chunks = split_text(text, settings.TTS_CHUNK_MAX_CHARS)
+        if len(chunks) > 1:
+            logger.info("[ELEVENLABS] Streaming %d chunks synthesized concurrently", len(chunks))
+            async for part in self._stream_chunks(chunks, voice_settings, model_id):
+                yield part
+            return
+        
+        cache_key = (model_id, self.voice_id, text, tuple(voice_settings.items()))
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            logger.info("[ELEVENLABS] ✓ Cache hit, skipping synthesis (%d bytes)", len(cached))
+            yield cached
+            return
+        
+        body = orjson.dumps({
+            "text": text,
+            "model_id": model_id,
+            "voice_settings": voice_settings,
+        })
+        
+        logger.debug("[ELEVENLABS] Streaming audio generation (%d characters, emotion: %s)", len(text), emotion)
+        
+        # The upstream read runs in its own task so the concurrency slot is
+        # released as soon as ElevenLabs is done, however slowly the caller
+        # drains the queue
+        queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue()
+        reader = asyncio.ensure_future(self._read_stream(body, queue))
+        try:
+            while True:
+                chunk = await queue.get()
+                if chunk is None:
+                    break
+                yield chunk
+            audio_data = await reader
+        
+        except httpx.HTTPStatusError as e:
+            raise self._api_error(e)
+        finally:
+            # Abandoned stream: stop reading from ElevenLabs
+            reader.cancel()
+        
+        # Only complete clips are cached; an abandoned stream never gets here
+        self._cache.set(cache_key, audio_data)
+        logger.info("[ELEVENLABS] ✓ Streamed %d bytes (emotion: %s)", len(audio_data), emotion)
+    
+    async def _read_stream(self, body: bytes, queue: "asyncio.Queue[Optional[bytes]]") -> bytes:
+        """
+        Read one clip from the streaming endpoint into a queue.
+        
+        Chunks are queued as they arrive and None marks the end, including
+        on failure, so the consumer never waits on a dead reader.
+        
+        Args:
+            body: Serialized request body
+            queue: Queue receiving the MP3 chunks
+        
+        Returns:
+            The complete clip
+        
+        Raises:
+            httpx.HTTPStatusError: If ElevenLabs rejects the request
+        """
+        audio_data = bytearray()
+        client = await self._get_client()
+        try:
+            # Retrying is only safe before the first byte reaches the caller;
+            # the slot is held per attempt, never across the backoff
+            attempt = 0
+            while True:
+                async with self._semaphore:
+                    async with client.stream(
+                        "POST",
+                        self._stream_url,
+                        headers=self._headers,
+                        params=_LATENCY_PARAMS,
+                        content=body,
+                        timeout=_GENERATE_TIMEOUT,
+                    ) as response:
+                        if response.is_error:
+                            # Error bodies are small; read them for the message
+                            await response.aread()
+                            delay = retry_delay(response, attempt)
+                            if delay is None:
+                                response.raise_for_status()
+                        else:
+                            async for chunk in response.aiter_bytes(_STREAM_CHUNK_SIZE):
+                                audio_data += chunk
+                                queue.put_nowait(chunk)
+                            return bytes(audio_data)
+                logger.warning(
+                    "[ELEVENLABS] Stream returned %d, retrying in %.1fs",
+                    response.status_code, delay,
+                )
+                await asyncio.sleep(delay)
+                attempt += 1
+        finally:
+            queue.put_nowait(None)
+    
+    async def _stream_chunks(self, chunks: List[str], voice_settings: Dict, model_id: str) -> AsyncIterator[bytes]:
+        """
+        Synthesize text chunks concurrently and yield their audio in order.
+        
+        Each part is released once yielded, so a long clip is never held
+        in memory as a whole; chunks are still cached individually.
+        
+        Args:
+            chunks: Text chunks, in playback order
+            voice_settings: ElevenLabs voice settings
+            model_id: ElevenLabs model
+        
+        Yields:
+            Binary audio data (MP3) per chunk
+        
+        Raises:
+            Exception: If any chunk fails
+        """
+        tasks: List[Optional[asyncio.Future]] = [
+            asyncio.ensure_future(self._synthesize(chunk, voice_settings, model_id))
+            for chunk in chunks
+        ]
+        try:
+            for i in range(len(tasks)):
+                part = await tasks[i]
+                tasks[i] = None
+                yield part
+                del part
+        except httpx.HTTPStatusError as e:
+            raise self._api_error(e)
+        finally:
+            # Failed chunk or abandoned stream: stop rendering the rest
+            for task in tasks:
+                if task is not None:
+                    task.cancel()
+    
+    def _api_error(self, e: httpx.HTTPStatusError) -> Exception:
+        """
+        Map an ElevenLabs HTTP error to a user-facing exception.
+        
+        Args:
+            e: HTTP status error from ElevenLabs
+        
+        Returns:
+            Exception to raise
+        """
+        error_detail = e.response.text if hasattr(e.response, 'text') else str(e)
+        logger.error("ElevenLabs API error: %s", e.response.status_code)
+        logger.error("Response: %s", error_detail)
+        
+        if e.response.status_code == 401:
+            return Exception("Invalid ElevenLabs API key. Please check your ELEVENLABS_API_KEY in .env file")
+        elif e.response.status_code == 403:
+            return Exception("ElevenLabs API access forbidden. Check your API key and quota")
+        else:
+            return Exception(f"ElevenLabs API error ({e.response.status_code}): {error_detail}")
+    
     async def get_available_voices(self) -> list:
         """
         Get list of available voices from ElevenLabs.
@@ -134,18 +439,18 @@ class TextToSpeechService:
                 "xi-api-key": self.api_key,
             }
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(url, headers=headers)
-                response.raise_for_status()
-                data = response.json()
+            client = await self._get_client()
+            response = await client.get(url, headers=headers)
+            response.raise_for_status()
+            data = orjson.loads(response.content)
             
             voices = data.get("voices", [])
-            logger.info(f"Retrieved {len(voices)} available voices")
+            logger.info("Retrieved %d available voices", len(voices))
             
             return voices
         
         except Exception as e:
-            logger.error(f"Failed to get voices: {str(e)}")
+            logger.error("Failed to get voices: %s", e)
             return []
 
 
@@ -2,7 +2,8 @@
 Router for translation endpoints.
 """
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import List
 from app.modules.translation.service import translation_service
 
 router = APIRouter(prefix="/translation", tags=["Translation"])
@@ -15,6 +16,13 @@ class TranslationRequest(BaseModel):
     target_lang: str = None
 
 
+class TranslationBatchRequest(BaseModel):
+    """Request model for batch translation."""
+    texts: List[str] = Field(..., min_length=1, max_length=50)  # DeepL's per-request limit
+    source_lang: str
+    target_lang: str = None
+
+
 class TranslationResponse(BaseModel):
     """Response model for translation."""
     translated_text: str
@@ -46,3 +54,23 @@ async def translate(request: TranslationRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/translate-batch", response_model=List[TranslationResponse])
+async def translate_batch(request: TranslationBatchRequest):
+    """
+    Translate several texts between the same languages in one DeepL request.
+    
+    Args:
+        request: Batch translation request with texts and languages
+    
+    Returns:
+        Translated text with language info per input text, in order
+    """
+    try:
+        return await translation_service.translate_batch(
+            texts=request.texts,
+            source_lang=request.source_lang,
+            target_lang=request.target_lang,
+        )
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -4,11 +4,28 @@ Translates text between English and Spanish.
 """
 import logging
 import httpx
-from typing import Dict
+import orjson
+from typing import Dict, List, Optional, Tuple
+from app.core.cache import LRUCache
 from app.core.config import settings
+from app.core.http_client import http_client, post_with_retry
+from app.core.utils import TARGET_LANGUAGES
 
 logger = logging.getLogger(__name__)
 
+# DeepL target codes that need a regional variant
+_TARGET_VARIANTS = {
+    "EN": "EN-US",  # Default to US English (can also use EN-GB)
+    "PT": "PT-BR",  # Default to Brazilian Portuguese (can also use PT-PT)
+}
+
+# Auto-detected source -> (DeepL source code, DeepL target code, target base
+# code), resolved once at import instead of on every call
+_LANG_PLAN = {
+    source: (source.upper(), _TARGET_VARIANTS.get(target.upper(), target.upper()), target)
+    for source, target in TARGET_LANGUAGES.items()
+}
+
 
 class TranslationService:
     """Service for translating text using DeepL API."""
@@ -16,17 +33,38 @@ class TranslationService:
     def __init__(self):
         self.api_key = settings.DEEPL_API_KEY
         self.base_url = settings.DEEPL_API_URL
-        self._client = None
+        # Identical for every request, so build them once
+        self._headers = {
+            "Authorization": f"DeepL-Auth-Key {self.api_key}",
+            "Content-Type": "application/x-www-form-urlencoded",
+        }
+        # Repeated phrases skip the paid DeepL round-trip
+        self._cache = LRUCache(
+            max_entries=settings.TRANSLATION_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.TRANSLATION_CACHE_TTL,
+        )
     
     async def _get_client(self):
-        """Get or create reusable HTTP client with optimized settings."""
-        if self._client is None:
-            self._client = httpx.AsyncClient(
-                timeout=httpx.Timeout(30.0, connect=5.0),
-                limits=httpx.Limits(max_keepalive_connections=5, max_connections=10),
-                http2=True
-            )
-        return self._client
+        """Get the HTTP client shared across upstream services."""
+        return http_client.get_client()
+    
+    async def warmup(self) -> None:
+        """
+        Open a pooled connection to DeepL ahead of the first request.
+        
+        Sends a bare HEAD to the translate endpoint so the TLS handshake and
+        HTTP/2 setup are done by the time a translation arrives. Failures are
+        logged, never raised.
+        """
+        if not self.api_key:
+            return
+        
+        try:
+            client = await self._get_client()
+            await client.head(self.base_url, headers={"Authorization": self._headers["Authorization"]})
+            logger.info("[DEEPL] ✓ Connection warmed up")
+        except Exception as e:
+            logger.warning("[DEEPL] Connection warm-up failed: %s", e)
     
     async def translate_text(
         self, 
@@ -49,22 +87,24 @@ class TranslationService:
             Exception: If translation fails
         """
         try:
-            # Auto-determine target language
-            if target_lang is None:
-                target_lang = self._get_target_language(source_lang)
+            source_lang_code, target_lang_code, target_base_code = self._plan_languages(source_lang, target_lang)
             
-            # Normalize language codes for DeepL
-            # Source: simple codes (EN, ES), Target: can have variants (EN-US, EN-GB)
-            source_lang_code = self._normalize_source_language(source_lang)
-            target_lang_code = self._normalize_target_language(target_lang)
+            # Same language on both sides: the text is already the answer
+            if source_lang_code.lower() == target_base_code:
+                logger.info("[DEEPL] Source and target are both %s, skipping translation", source_lang_code)
+                return {
+                    "translated_text": text,
+                    "source_language": target_base_code,
+                    "target_language": target_base_code,
+                }
             
-            logger.info(f"[DEEPL] Translating: {source_lang_code} -> {target_lang_code}")
-            logger.debug(f"[DEEPL] Text to translate: {text[:100]}...")
+            cache_key = (source_lang_code, target_lang_code, text)
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                logger.info("[DEEPL] ✓ Cache hit: %s -> %s", source_lang_code, target_lang_code)
+                return dict(cached)
             
-            headers = {
-                "Authorization": f"DeepL-Auth-Key {self.api_key}",
-                "Content-Type": "application/x-www-form-urlencoded",
-            }
+            logger.debug("[DEEPL] Translating: %s -> %s: %.100s", source_lang_code, target_lang_code, text)
             
             data = {
                 "text": text,
@@ -74,13 +114,13 @@ class TranslationService:
             }
             
             client = await self._get_client()
-            response = await client.post(
+            response = await post_with_retry(
+                client,
                 self.base_url,
-                headers=headers,
+                headers=self._headers,
                 data=data,
             )
-            response.raise_for_status()
-            result = response.json()
+            result = orjson.loads(response.content)
             
             # Extract translation
             translations = result.get("translations", [])
@@ -90,35 +130,142 @@ class TranslationService:
             translated_text = translations[0].get("text", "")
             detected_source = translations[0].get("detected_source_language", source_lang_code)
             
-            logger.info(f"[DEEPL] ✓ Translation successful: {source_lang_code} -> {target_lang_code}")
-            logger.info(f"[DEEPL] Translated text: {translated_text[:100]}...")
+            logger.info("[DEEPL] ✓ Translation successful: %s -> %s", source_lang_code, target_lang_code)
+            logger.debug("[DEEPL] Translated text: %.100s", translated_text)
             
-            # Extract base language code (remove variants like -US, -GB)
-            target_base_code = target_lang_code.split('-')[0].lower()
-            
-            logger.info(f"[DEEPL] Returning target language: {target_base_code}")
-            
-            return {
+            result = {
                 "translated_text": translated_text,
                 "source_language": detected_source.lower(),
                 "target_language": target_base_code,  # Return base code (en, es, etc.)
             }
+            self._cache.set(cache_key, result)
+            return dict(result)
         
         except httpx.HTTPStatusError as e:
-            error_detail = e.response.text if hasattr(e.response, 'text') else str(e)
-            logger.error(f"DeepL API error: {e.response.status_code}")
-            logger.error(f"Response: {error_detail}")
+            raise self._api_error(e)
+        except Exception as e:
+            error_msg = str(e) if str(e) else "Unknown translation error"
+            logger.error("Translation error: %s", error_msg)
+            logger.exception("Full traceback:")
+            raise Exception(error_msg)
+    
+    async def translate_batch(
+        self,
+        texts: List[str],
+        source_lang: str,
+        target_lang: str = None,
+    ) -> List[Dict[str, str]]:
+        """
+        Translate several texts with one DeepL request.
+        
+        DeepL accepts repeated text fields and returns translations in the
+        same order. Cached texts are answered locally and only the rest are
+        sent.
+        
+        Args:
+            texts: Texts to translate
+            source_lang: Source language code (en, es)
+            target_lang: Target language code (if None, auto-detect opposite)
+        
+        Returns:
+            Dictionary with 'translated_text' and 'target_language' keys per text, in order
+        
+        Raises:
+            Exception: If translation fails
+        """
+        try:
+            source_lang_code, target_lang_code, target_base_code = self._plan_languages(source_lang, target_lang)
             
-            if e.response.status_code == 401 or e.response.status_code == 403:
-                raise Exception("Invalid DeepL API key. Please check your DEEPL_API_KEY in .env file")
-            else:
-                raise Exception(f"DeepL API error ({e.response.status_code}): {error_detail}")
+            if source_lang_code.lower() == target_base_code:
+                return [
+                    {"translated_text": text, "source_language": target_base_code, "target_language": target_base_code}
+                    for text in texts
+                ]
+            
+            results = [self._cache.get((source_lang_code, target_lang_code, text)) for text in texts]
+            missing = [i for i, result in enumerate(results) if result is None]
+            
+            if missing:
+                logger.info("[DEEPL] Translating batch of %d: %s -> %s", len(missing), source_lang_code, target_lang_code)
+                
+                # httpx encodes a list value as repeated text fields, in order
+                data = {
+                    "text": [texts[i] for i in missing],
+                    "source_lang": source_lang_code,
+                    "target_lang": target_lang_code,
+                    "formality": "default",
+                }
+                
+                client = await self._get_client()
+                response = await post_with_retry(client, self.base_url, headers=self._headers, data=data)
+                
+                translations = orjson.loads(response.content).get("translations", [])
+                if len(translations) != len(missing):
+                    raise Exception("DeepL returned an unexpected number of translations")
+                
+                for i, translation in zip(missing, translations):
+                    result = {
+                        "translated_text": translation.get("text", ""),
+                        "source_language": translation.get("detected_source_language", source_lang_code).lower(),
+                        "target_language": target_base_code,
+                    }
+                    self._cache.set((source_lang_code, target_lang_code, texts[i]), result)
+                    results[i] = result
+            
+            return [dict(result) for result in results]
+        
+        except httpx.HTTPStatusError as e:
+            raise self._api_error(e)
         except Exception as e:
             error_msg = str(e) if str(e) else "Unknown translation error"
-            logger.error(f"Translation error: {error_msg}")
+            logger.error("Batch translation error: %s", error_msg)
             logger.exception("Full traceback:")
             raise Exception(error_msg)
     
+    def _api_error(self, e: httpx.HTTPStatusError) -> Exception:
+        """
+        Map a DeepL HTTP error to a user-facing exception.
+        
+        Args:
+            e: HTTP status error from DeepL
+        
+        Returns:
+            Exception to raise
+        """
+        error_detail = e.response.text if hasattr(e.response, 'text') else str(e)
+        logger.error("DeepL API error: %d", e.response.status_code)
+        logger.error("Response: %s", error_detail)
+        
+        if e.response.status_code == 401 or e.response.status_code == 403:
+            return Exception("Invalid DeepL API key. Please check your DEEPL_API_KEY in .env file")
+        else:
+            return Exception(f"DeepL API error ({e.response.status_code}): {error_detail}")
+    
+    def _plan_languages(self, source_lang: str, target_lang: Optional[str]) -> Tuple[str, str, str]:
+        """
+        Resolve the DeepL language codes for a translation.
+        
+        Auto-detected English and Spanish are a single table lookup; explicit
+        targets and other languages go through the normalizers.
+        
+        Args:
+            source_lang: Source language code
+            target_lang: Target language code, or None to auto-determine
+        
+        Returns:
+            DeepL source code (ES), DeepL target code (EN-US) and target base code (en)
+        """
+        if target_lang is None:
+            plan = _LANG_PLAN.get(source_lang.lower()[:2])
+            if plan is not None:
+                return plan
+            target_lang = self._get_target_language(source_lang)
+        
+        # Source: simple codes (EN, ES), Target: can have variants (EN-US, EN-GB)
+        source_lang_code = self._normalize_source_language(source_lang)
+        target_lang_code = self._normalize_target_language(target_lang)
+        return source_lang_code, target_lang_code, target_lang_code.split('-')[0].lower()
+    
     def _get_target_language(self, source_lang: str) -> str:
         """
         Get target language based on source language.
@@ -134,21 +281,13 @@ class TranslationService:
             Target language code
         """
         source = source_lang.lower()[:2]
-        
-        # If Spanish detected, translate to English
-        if source == "es":
-            logger.info("[TRANSLATION] Spanish detected → translating to English")
+        target = TARGET_LANGUAGES.get(source)
+        if target is None:
+            logger.warning("[TRANSLATION] Unknown language '%s' → defaulting to English", source)
             return "en"
         
-        # If English detected, translate to Spanish
-        elif source == "en":
-            logger.info("[TRANSLATION] English detected → translating to Spanish")
-            return "es"
-        
-        # Default to English for other languages
-        else:
-            logger.warning(f"[TRANSLATION] Unknown language '{source}' → defaulting to English")
-            return "en"
+        logger.debug("[TRANSLATION] %s detected → translating to %s", source, target)
+        return target
     
     def _normalize_source_language(self, lang_code: str) -> str:
         """
@@ -162,8 +301,7 @@ class TranslationService:
             Normalized source language code (uppercase, no variants)
         """
         # DeepL source languages: simple 2-letter codes only
-        code = lang_code.upper()[:2]
-        return code
+        return lang_code.upper()[:2]
     
     def _normalize_target_language(self, lang_code: str) -> str:
         """
@@ -178,14 +316,7 @@ class TranslationService:
         """
         # DeepL target languages: can have variants
         code = lang_code.upper()[:2]
-        
-        # Map to DeepL supported target codes with variants
-        if code == "EN":
-            return "EN-US"  # Default to US English (can also use EN-GB)
-        elif code == "PT":
-            return "PT-BR"  # Default to Brazilian Portuguese (can also use PT-PT)
-        
-        return code
+        return _TARGET_VARIANTS.get(code, code)
 
 
 # Global service instance
@@ -1,17 +1,35 @@
 """Custom middleware for the application."""
 import time
-from typing import Callable
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 
-class TimingMiddleware(BaseHTTPMiddleware):
-    """Middleware to log request processing time."""
+class TimingMiddleware:
+    """
+    Middleware to add request processing time as an X-Process-Time header.
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    Plain ASGI rather than BaseHTTPMiddleware, so responses (including
+    streamed ones) pass through without an extra task and body buffer.
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """Process request and add timing header."""
-        start_time = time.time()
-        response = await call_next(request)
-        process_time = time.time() - start_time
-        response.headers["X-Process-Time"] = str(process_time)
-        return response
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        start_time = time.perf_counter()
+        
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # Time until the response starts; streamed bodies follow after
+                process_time = time.perf_counter() - start_time
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-process-time", f"{process_time:.6f}".encode()),
+                ]
+            await send(message)
+        
+        await self.app(scope, receive, send_with_timing)
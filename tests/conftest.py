@@ -25,6 +25,15 @@ def mock_redis():
                         yield
 
 
+@pytest.fixture(autouse=True)
+def clear_pipeline_cache():
+    """Start every test with an empty pipeline result cache."""
+    from app.main import pipeline_cache
+    pipeline_cache.clear()
+    yield
+    pipeline_cache.clear()
+
+
 @pytest.fixture
 def sample_audio_data():
     """Sample audio data for testing."""
@@ -0,0 +1,33 @@
+"""
+Unit tests for the in-process LRU cache.
+"""
+from app.core.cache import LRUCache
+
+
+def test_lru_cache_evicts_least_recently_used():
+    """Test the oldest untouched entry is evicted once full."""
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_lru_cache_expires_entries(monkeypatch):
+    """Test entries older than the TTL are treated as missing."""
+    now = [1000.0]
+    monkeypatch.setattr("app.core.cache.time.monotonic", lambda: now[0])
+    cache = LRUCache(max_entries=4, ttl_seconds=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    
+    now[0] += 11
+    assert cache.get("a", "miss") == "miss"
+    assert cache.purge_expired() == 1
+    assert len(cache) == 0
@@ -1,10 +1,13 @@
 """
 Unit tests for main API endpoints.
 """
+import base64
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import patch, AsyncMock
+from unittest.mock import patch, AsyncMock, MagicMock
+from urllib.parse import unquote
 from app.main import app
+from app.modules.emotion_detection.service import emotion_detection_service
 
 client = TestClient(app)
 
@@ -24,6 +27,7 @@ def test_health_check():
     """Test health check endpoint."""
     response = client.get("/health")
     assert response.status_code == 200
+    assert float(response.headers["X-Process-Time"]) >= 0
     data = response.json()
     assert "status" in data
 
@@ -84,6 +88,231 @@ async def test_process_audio_integration(
     assert data["emotion"] == "happy"
 
 
+@patch("app.modules.speech_to_text.service.speech_to_text_service.transcribe_audio")
+@patch("app.modules.emotion_detection.service.emotion_detection_service.detect_emotion")
+@patch("app.modules.translation.service.translation_service.translate_text")
+@patch("app.modules.text_to_speech.service.text_to_speech_service.generate_audio")
+def test_process_audio_binary(
+    mock_tts,
+    mock_translation,
+    mock_emotion,
+    mock_stt,
+    sample_transcription,
+    sample_emotion,
+    sample_translation,
+):
+    """Test binary pipeline endpoint returns raw audio with metadata headers."""
+    mock_stt.return_value = sample_transcription
+    mock_emotion.return_value = sample_emotion
+    mock_translation.return_value = sample_translation
+    mock_tts.return_value = b"fake_audio_data"
+    
+    files = {
+        "audio": ("test.wav", b"fake_audio_content", "audio/wav")
+    }
+    
+    response = client.post("/api/process-audio/binary", files=files)
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "audio/mpeg"
+    assert response.content == b"fake_audio_data"
+    assert unquote(response.headers["x-translated-text"]) == "Hola, ¿cómo estás?"
+    assert response.headers["x-emotion"] == "happy"
+    
+    # The JSON endpoint negotiates the same binary response
+    response = client.post("/api/process-audio", files=files, headers={"Accept": "audio/*"})
+    
+    assert response.headers["content-type"] == "audio/mpeg"
+    assert response.content == b"fake_audio_data"
+
+
+@patch("app.modules.speech_to_text.service.speech_to_text_service.transcribe_audio")
+@patch("app.modules.emotion_detection.service.emotion_detection_service.detect_emotion")
+@patch("app.modules.translation.service.translation_service.translate_text")
+@patch("app.modules.text_to_speech.service.text_to_speech_service.generate_audio")
+def test_process_audio_accept_negotiation(
+    mock_tts,
+    mock_translation,
+    mock_emotion,
+    mock_stt,
+    sample_transcription,
+    sample_emotion,
+    sample_translation,
+):
+    """Test Accept q-values pick JSON or raw audio, and both vary on Accept."""
+    mock_stt.return_value = sample_transcription
+    mock_emotion.return_value = sample_emotion
+    mock_translation.return_value = sample_translation
+    mock_tts.return_value = b"fake_audio_data"
+    
+    files = {
+        "audio": ("test.wav", b"fake_audio_content", "audio/wav")
+    }
+    
+    cases = {
+        "application/json, audio/*;q=0": "application/json",
+        "application/json;q=0.5, audio/mpeg": "audio/mpeg",
+        "audio/*;q=0.8, application/json": "application/json",
+        "*/*": "application/json",
+    }
+    for accept, expected in cases.items():
+        response = client.post("/api/process-audio", files=files, headers={"Accept": accept})
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"] == expected, accept
+        assert response.headers["vary"] == "Accept"
+
+
+@patch("app.modules.emotion_detection.service.emotion_detection_service.detect_emotions_batch")
+def test_emotion_detect_batch(mock_batch, sample_emotion):
+    """Test the batch endpoint passes every clip through in upload order."""
+    mock_batch.return_value = [sample_emotion, sample_emotion]
+    
+    files = [
+        ("audio", ("one.wav", b"first_clip", "audio/wav")),
+        ("audio", ("two.wav", b"second_clip", "audio/wav")),
+    ]
+    
+    response = client.post("/api/emotion/detect-batch", files=files)
+    
+    assert response.status_code == 200
+    assert [r["emotion"] for r in response.json()] == ["happy", "happy"]
+    assert mock_batch.call_args.args[0] == [b"first_clip", b"second_clip"]
+    assert mock_batch.call_args.kwargs["filenames"] == ["one.wav", "two.wav"]
+
+
+@patch("app.modules.translation.service.translation_service.translate_batch")
+def test_translate_batch_endpoint(mock_batch, sample_translation):
+    """Test the batch translation endpoint returns one result per text."""
+    mock_batch.return_value = [sample_translation, sample_translation]
+    
+    response = client.post(
+        "/api/translation/translate-batch",
+        json={"texts": ["Hello", "How are you?"], "source_lang": "en"},
+    )
+    
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+    assert mock_batch.call_args.kwargs["texts"] == ["Hello", "How are you?"]
+    
+    assert client.post("/api/translation/translate-batch", json={"texts": [], "source_lang": "en"}).status_code == 422
+
+
+def test_cors_allows_only_configured_origins():
+    """Test only configured origins get CORS headers, and they aren't echoed."""
+    allowed = client.get("/health", headers={"Origin": "http://localhost:3000"})
+    foreign = client.get("/health", headers={"Origin": "https://evil.example"})
+    
+    assert allowed.headers["access-control-allow-origin"] == "http://localhost:3000"
+    assert allowed.headers["access-control-allow-credentials"] == "true"
+    assert "access-control-allow-origin" not in foreign.headers
+
+
+def test_process_audio_documents_audio_response():
+    """Test the OpenAPI schema lists the raw MP3 alternative."""
+    content = app.openapi()["paths"]["/api/process-audio"]["post"]["responses"]["200"]["content"]
+    
+    assert "application/json" in content
+    assert "audio/mpeg" in content
+
+
+@patch("app.modules.speech_to_text.service.speech_to_text_service.transcribe_audio")
+@patch("app.modules.emotion_detection.service.emotion_detection_service.detect_emotion")
+@patch("app.modules.translation.service.translation_service.translate_text")
+@patch("app.modules.text_to_speech.service.text_to_speech_service.generate_audio")
+def test_process_audio_repeat_upload_cached(
+    mock_tts,
+    mock_translation,
+    mock_emotion,
+    mock_stt,
+    sample_transcription,
+    sample_emotion,
+    sample_translation,
+):
+    """Test identical uploads are served from the pipeline cache."""
+    mock_stt.return_value = sample_transcription
+    mock_emotion.return_value = sample_emotion
+    mock_translation.return_value = sample_translation
+    mock_tts.return_value = b"fake_audio_data"
+    
+    files = {
+        "audio": ("test.wav", b"fake_audio_content", "audio/wav")
+    }
+    
+    first = client.post("/api/process-audio", files=files)
+    second = client.post("/api/process-audio", files=files)
+    
+    assert first.status_code == 200
+    assert second.json() == first.json()
+    assert mock_stt.call_count == 1
+    assert mock_tts.call_count == 1
+
+
+@patch("app.modules.speech_to_text.service.speech_to_text_service.transcribe_audio")
+@patch("app.modules.translation.service.translation_service.translate_text")
+@patch("app.modules.text_to_speech.service.text_to_speech_service.generate_audio")
+def test_process_audio_emotion_fallback_not_cached(
+    mock_tts,
+    mock_translation,
+    mock_stt,
+    sample_transcription,
+    sample_translation,
+):
+    """Test a neutral fallback from a failed extraction isn't cached."""
+    mock_stt.return_value = sample_transcription
+    mock_translation.return_value = sample_translation
+    mock_tts.return_value = b"fake_audio_data"
+    
+    files = {
+        "audio": ("test.wav", b"fallback_audio_content", "audio/wav")
+    }
+    
+    service = emotion_detection_service
+    with patch.object(service, "smile", MagicMock()), \
+            patch.object(service, "_extract_features", return_value=MagicMock(empty=False)), \
+            patch.object(service, "_extract_emotional_attributes", side_effect=RuntimeError("bad features")):
+        first = client.post("/api/process-audio", files=files)
+        second = client.post("/api/process-audio", files=files)
+    
+    assert first.status_code == 200
+    assert first.json()["emotion"] == "neutral"
+    assert second.status_code == 200
+    assert mock_stt.call_count == 2
+
+
+@patch("app.modules.speech_to_text.service.speech_to_text_service.transcribe_audio")
+@patch("app.modules.emotion_detection.service.emotion_detection_service.detect_emotion")
+@patch("app.modules.translation.service.translation_service.translate_text")
+@patch("app.modules.text_to_speech.service.text_to_speech_service.generate_audio")
+def test_process_audio_streams_large_audio(
+    mock_tts,
+    mock_translation,
+    mock_emotion,
+    mock_stt,
+    sample_transcription,
+    sample_emotion,
+    sample_translation,
+):
+    """Test multi-chunk audio is streamed back as one valid base64 field."""
+    audio = bytes(range(256)) * 4000
+    mock_stt.return_value = sample_transcription
+    mock_emotion.return_value = sample_emotion
+    mock_translation.return_value = sample_translation
+    mock_tts.return_value = audio
+    
+    files = {
+        "audio": ("test.wav", b"fake_audio_content", "audio/wav")
+    }
+    
+    response = client.post("/api/process-audio", files=files)
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert base64.b64decode(data["audio_base64"]) == audio
+    assert data["audio_size_bytes"] == len(audio)
+    assert data["translated_text"] == "Hola, ¿cómo estás?"
+
+
 def test_process_audio_invalid_file():
     """Test process audio with invalid file format."""
     files = {
@@ -94,6 +323,38 @@ def test_process_audio_invalid_file():
     assert response.status_code == 400
 
 
+def test_process_audio_file_too_large():
+    """Test process audio rejects uploads over the size limit."""
+    files = {
+        "audio": ("test.wav", b"x" * 2048, "audio/wav")
+    }
+    
+    with patch("app.core.utils.settings.MAX_AUDIO_SIZE_MB", 0):
+        response = client.post("/api/process-audio", files=files)
+    assert response.status_code == 413
+
+
+def test_text_to_speech_stream():
+    """Test streamed TTS returns every chunk, and upstream errors as 500."""
+    async def chunks(**kwargs):
+        for chunk in (b"fake_", b"mp3"):
+            yield chunk
+    
+    async def failing(**kwargs):
+        raise Exception("ElevenLabs API error (500): boom")
+        yield b""
+    
+    with patch("app.modules.text_to_speech.service.text_to_speech_service.generate_audio_stream", new=chunks):
+        response = client.post("/api/text-to-speech/stream", json={"text": "Hola"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "audio/mpeg"
+    assert response.content == b"fake_mp3"
+    
+    with patch("app.modules.text_to_speech.service.text_to_speech_service.generate_audio_stream", new=failing):
+        response = client.post("/api/text-to-speech/stream", json={"text": "Hola"})
+    assert response.status_code == 500
+
+
 def test_api_docs_available():
     """Test that API documentation is accessible."""
     response = client.get("/docs")
@@ -1,12 +1,22 @@
 """
 Unit tests for individual services.
 """
+import asyncio
+import hashlib
+import io
+import logging
+import struct
+import wave
+import httpx
+import numpy as np
+import orjson
 import pytest
 from unittest.mock import patch, AsyncMock, MagicMock
+from app.core.redis_client import RedisClient
 from app.modules.speech_to_text.service import SpeechToTextService
-from app.modules.emotion_detection.service import EmotionDetectionService
+from app.modules.emotion_detection.service import EmotionDetectionService, _EMOTIONS, _decode_pcm16_wav
 from app.modules.translation.service import TranslationService
-from app.modules.text_to_speech.service import TextToSpeechService
+from app.modules.text_to_speech.service import TextToSpeechService, split_text
 
 
 @pytest.mark.asyncio
@@ -17,7 +27,7 @@ class TestSpeechToTextService:
     async def test_transcribe_audio_success(self, mock_post):
         """Test successful audio transcription."""
         mock_response = MagicMock()
-        mock_response.json.return_value = {
+        mock_response.content = orjson.dumps({
             "results": {
                 "channels": [
                     {
@@ -28,7 +38,7 @@ class TestSpeechToTextService:
                     }
                 ]
             }
-        }
+        })
         mock_response.raise_for_status = MagicMock()
         mock_post.return_value = mock_response
         
@@ -38,6 +48,16 @@ class TestSpeechToTextService:
         assert result["text"] == "Hello world"
         assert result["language"] == "English"
         assert result["language_code"] == "en"
+    
+    @patch("httpx.AsyncClient.head")
+    async def test_warmup_never_raises(self, mock_head):
+        """Test a failed preconnect is logged instead of raised."""
+        mock_head.side_effect = httpx.ConnectError("unreachable")
+        
+        service = SpeechToTextService()
+        await service.warmup()
+        
+        mock_head.assert_called_once()
 
 
 @pytest.mark.asyncio
@@ -54,6 +74,167 @@ class TestEmotionDetectionService:
         assert result["emotion"] in ["happy", "sad", "angry", "neutral", "surprised"]
         assert "pitch_mean" in result["attributes"]
         assert "energy" in result["attributes"]
+    
+    async def test_detect_emotion_cached_and_coalesced(self):
+        """Test repeated and concurrent identical audio run extraction once."""
+        service = EmotionDetectionService()
+        service.smile = MagicMock()
+        service._feature_idx = np.array([0, 1, 2])
+        features = MagicMock(empty=False)
+        features.to_numpy.return_value = np.array([[0.0, 0.0, 0.0]])
+        
+        with patch.object(service, "_extract_features", return_value=features) as mock_extract:
+            first, second = await asyncio.gather(
+                service.detect_emotion(b"same_audio"),
+                service.detect_emotion(b"same_audio"),
+            )
+            first["attributes"]["energy"] = 1.0
+            third = await service.detect_emotion(b"same_audio")
+        
+        assert mock_extract.call_count == 1
+        assert second == third
+        assert third["attributes"]["energy"] == 0.5
+    
+    async def test_detect_emotion_persisted_result(self):
+        """Test a result persisted in Redis is reused without extraction."""
+        service = EmotionDetectionService()
+        service.smile = MagicMock()
+        persisted = {"emotion": "happy", "attributes": {"pitch_mean": 0.6, "energy": 0.55, "speaking_rate": 0.6}}
+        
+        with patch("app.modules.emotion_detection.service.redis_client.get_json", new=AsyncMock(return_value=persisted)), \
+                patch.object(service, "_extract_features") as mock_extract:
+            result = await service.detect_emotion(b"persisted_audio")
+        
+        assert result == persisted
+        mock_extract.assert_not_called()
+    
+    async def test_detect_emotion_redis_unavailable(self, caplog):
+        """Test a failed Redis connect leaves detection free of Redis calls and errors."""
+        client = RedisClient()
+        with patch("app.core.redis_client.settings.REDIS_HOST", "127.0.0.1"), \
+                patch("app.core.redis_client.settings.REDIS_PORT", 1):
+            with pytest.raises(Exception):
+                await client.connect()
+        assert client.redis is None
+        
+        service = EmotionDetectionService()
+        service.smile = MagicMock()
+        service._feature_idx = np.array([0, 1, 2])
+        features = MagicMock(empty=False)
+        features.to_numpy.return_value = np.array([[0.0, 0.0, 0.0]])
+        
+        caplog.clear()
+        with patch("app.modules.emotion_detection.service.redis_client", client), \
+                patch("redis.asyncio.Redis.execute_command", new=AsyncMock()) as mock_command, \
+                patch.object(service, "_extract_features", return_value=features):
+            result = await service.detect_emotion(b"no_redis_audio")
+        
+        assert result["emotion"] == "neutral"
+        mock_command.assert_not_called()
+        assert not [r for r in caplog.records if r.levelno >= logging.ERROR]
+    
+    async def test_detect_emotions_batch(self):
+        """Test batch detection classifies each clip and caches successes."""
+        service = EmotionDetectionService()
+        service.smile = MagicMock()
+        service._feature_idx = np.array([0, 1, 2])
+        
+        def extract(audio_data, filename):
+            if audio_data == b"bad":
+                raise ValueError("undecodable")
+            features = MagicMock(empty=False)
+            features.to_numpy.return_value = np.array([[-100.0, -40.0, -40.0]])
+            return features
+        
+        with patch.object(service, "_extract_features", side_effect=extract) as mock_extract:
+            results = await service.detect_emotions_batch([b"quiet", b"bad"])
+            again = await service.detect_emotions_batch([b"quiet"])
+        
+        assert [r["emotion"] for r in results] == ["sad", "neutral"]
+        assert results[0]["attributes"] == {"pitch_mean": 0.0, "energy": 0.0, "speaking_rate": 0.0}
+        assert again == results[:1]
+        assert mock_extract.call_count == 2
+    
+    async def test_detect_emotions_batch_cache_paths(self):
+        """Test batch detection reuses Redis results and extracts duplicates once."""
+        service = EmotionDetectionService()
+        service.smile = MagicMock()
+        service._feature_idx = np.array([0, 1, 2])
+        features = MagicMock(empty=False)
+        features.to_numpy.return_value = np.array([[-100.0, -40.0, -40.0]])
+        persisted = {"emotion": "happy", "attributes": {"pitch_mean": 0.6, "energy": 0.55, "speaking_rate": 0.6}}
+        
+        async def get_json(key):
+            return persisted if key.endswith(hashlib.blake2b(b"stored", digest_size=16).hexdigest()) else None
+        
+        with patch("app.modules.emotion_detection.service.redis_client.get_json", new=AsyncMock(side_effect=get_json)), \
+                patch("app.modules.emotion_detection.service.redis_client.set_json", new=AsyncMock()) as mock_set, \
+                patch.object(service, "_extract_features", return_value=features) as mock_extract:
+            results = await service.detect_emotions_batch([b"stored", b"quiet", b"quiet"])
+            single = await service.detect_emotion(b"quiet")
+        
+        assert [r["emotion"] for r in results] == ["happy", "sad", "sad"]
+        assert single == results[1]
+        assert mock_extract.call_count == 1
+        assert mock_set.await_count == 1
+    
+    async def test_detect_emotions_batch_filename_mismatch(self):
+        """Test a filename list of the wrong length is rejected."""
+        service = EmotionDetectionService()
+        service.smile = MagicMock()
+        
+        with pytest.raises(ValueError):
+            await service.detect_emotions_batch([b"one", b"two"], filenames=["one.wav"])
+
+
+class TestEmotionDetectionHelpers:
+    """Tests for the synchronous emotion detection helpers."""
+    
+    def test_decode_pcm16_wav_fast_path(self):
+        """Test canonical PCM16 WAV is decoded in memory without soundfile."""
+        buf = io.BytesIO()
+        with wave.open(buf, "wb") as wav:
+            wav.setnchannels(2)
+            wav.setsampwidth(2)
+            wav.setframerate(16000)
+            wav.writeframes(struct.pack("<4h", 16384, -16384, 16384, 16384))
+        
+        signal, sampling_rate = _decode_pcm16_wav(buf.getvalue())
+        
+        assert sampling_rate == 16000
+        assert signal.tolist() == [0.0, 0.5]
+        assert _decode_pcm16_wav(b"ID3" + b"\x00" * 64) is None
+    
+    def test_extract_emotional_attributes(self):
+        """Test attributes are read by cached column position and normalized."""
+        service = EmotionDetectionService()
+        service._feature_idx = np.array([2, 0, 1])
+        features = MagicMock()
+        features.to_numpy.return_value = np.array([[-40.0, 40.0, 0.0]])
+        
+        attributes = service._extract_emotional_attributes(features)
+        
+        assert attributes == {"pitch_mean": 0.5, "energy": 0.0, "speaking_rate": 1.0}
+    
+    def test_classify_batch_matches_scalar(self):
+        """Test vectorized classification agrees with the per-row rules."""
+        service = EmotionDetectionService()
+        rng = np.random.default_rng(0)
+        # Rounded rows land exactly on rule thresholds (open vs closed bounds)
+        grid = np.round(np.arange(0.36, 0.82, 0.02), 2)
+        rows = np.concatenate([
+            rng.random((500, 3)),
+            np.round(rng.random((500, 3)), 2),
+            np.stack(np.meshgrid(grid, grid, grid), axis=-1).reshape(-1, 3),
+        ])
+        
+        labels = service.classify_batch(rows)
+        
+        assert set(labels) == set(_EMOTIONS)
+        assert labels == [
+            service._classify_emotion({"pitch_mean": p, "energy": e, "speaking_rate": r})
+            for p, e, r in rows
+        ]
 
 
 @pytest.mark.asyncio
@@ -64,14 +245,14 @@ class TestTranslationService:
     async def test_translate_text_success(self, mock_post):
         """Test successful text translation."""
         mock_response = MagicMock()
-        mock_response.json.return_value = {
+        mock_response.content = orjson.dumps({
             "translations": [
                 {
                     "text": "Hola mundo",
                     "detected_source_language": "EN"
                 }
             ]
-        }
+        })
         mock_response.raise_for_status = MagicMock()
         mock_post.return_value = mock_response
         
@@ -81,12 +262,133 @@ class TestTranslationService:
         assert result["translated_text"] == "Hola mundo"
         assert result["target_language"] == "es"
     
+    @patch("httpx.AsyncClient.post")
+    async def test_translate_text_same_language(self, mock_post):
+        """Test identical source and target languages skip the API call."""
+        service = TranslationService()
+        result = await service.translate_text("Hello world", "en", "en")
+        
+        assert result["translated_text"] == "Hello world"
+        assert result["target_language"] == "en"
+        mock_post.assert_not_called()
+    
+    @patch("httpx.AsyncClient.post")
+    async def test_translate_text_cached(self, mock_post):
+        """Test repeated text and language pair reuse the translation."""
+        mock_response = MagicMock()
+        mock_response.content = orjson.dumps({
+            "translations": [{"text": "Hola mundo", "detected_source_language": "EN"}]
+        })
+        mock_response.raise_for_status = MagicMock()
+        mock_post.return_value = mock_response
+        
+        service = TranslationService()
+        first = await service.translate_text("Hello world", "en", "es")
+        second = await service.translate_text("Hello world", "en", "es")
+        
+        assert first == second
+        assert second["translated_text"] == "Hola mundo"
+        assert mock_post.call_count == 1
+    
+    @patch("httpx.AsyncClient.post")
+    async def test_translate_batch(self, mock_post):
+        """Test batch translation sends only uncached texts in one request."""
+        mock_response = MagicMock()
+        mock_response.content = orjson.dumps({
+            "translations": [
+                {"text": "Hola", "detected_source_language": "EN"},
+                {"text": "Adiós", "detected_source_language": "EN"},
+            ]
+        })
+        mock_response.raise_for_status = MagicMock()
+        mock_post.return_value = mock_response
+        
+        service = TranslationService()
+        results = await service.translate_batch(["Hello", "Goodbye"], "en", "es")
+        cached = await service.translate_batch(["Goodbye", "Hello"], "en", "es")
+        
+        assert [r["translated_text"] for r in results] == ["Hola", "Adiós"]
+        assert [r["translated_text"] for r in cached] == ["Adiós", "Hola"]
+        assert mock_post.call_count == 1
+        assert mock_post.call_args.kwargs["data"]["text"] == ["Hello", "Goodbye"]
+    
+    @patch("httpx.AsyncClient.post")
+    async def test_translate_batch_upstream_error(self, mock_post):
+        """Test batch failures surface as the service's usual errors."""
+        request = httpx.Request("POST", "https://api-free.deepl.com/v2/translate")
+        service = TranslationService()
+        
+        mock_post.return_value = httpx.Response(403, text="forbidden", request=request)
+        with pytest.raises(Exception, match="Invalid DeepL API key"):
+            await service.translate_batch(["Hello"], "en", "es")
+        
+        mock_post.return_value = httpx.Response(200, content=b"not json", request=request)
+        with pytest.raises(Exception) as excinfo:
+            await service.translate_batch(["Hello"], "en", "es")
+        assert type(excinfo.value) is Exception
+    
+    @patch("asyncio.sleep", new_callable=AsyncMock)
+    @patch("httpx.AsyncClient.post")
+    async def test_translate_text_retries_rate_limit(self, mock_post, mock_sleep):
+        """Test a 429 is retried after the Retry-After delay."""
+        request = httpx.Request("POST", "https://api-free.deepl.com/v2/translate")
+        limited = httpx.Response(429, headers={"Retry-After": "1"}, request=request)
+        ok = httpx.Response(
+            200,
+            json={"translations": [{"text": "Hola mundo", "detected_source_language": "EN"}]},
+            request=request,
+        )
+        mock_post.side_effect = [limited, ok]
+        
+        service = TranslationService()
+        result = await service.translate_text("Hello world", "en", "es")
+        
+        assert result["translated_text"] == "Hola mundo"
+        assert mock_post.call_count == 2
+        mock_sleep.assert_awaited_once_with(1.0)
+    
+    @patch("asyncio.sleep", new_callable=AsyncMock)
+    @patch("httpx.AsyncClient.post")
+    async def test_translate_text_gives_up_after_retries(self, mock_post, mock_sleep):
+        """Test persistent 5xx errors surface once retries run out."""
+        request = httpx.Request("POST", "https://api-free.deepl.com/v2/translate")
+        mock_post.return_value = httpx.Response(503, text="unavailable", request=request)
+        
+        service = TranslationService()
+        with pytest.raises(Exception, match="DeepL API error"):
+            await service.translate_text("Hello world", "en", "es")
+        
+        assert mock_post.call_count == 3
+        assert [c.args[0] for c in mock_sleep.await_args_list] == [0.5, 1.0]
+    
     def test_get_target_language(self):
         """Test automatic target language detection."""
         service = TranslationService()
         
         assert service._get_target_language("en") == "es"
         assert service._get_target_language("es") == "en"
+    
+    @patch("httpx.AsyncClient.head")
+    async def test_warmup_never_raises(self, mock_head):
+        """Test a failed preconnect is logged instead of raised."""
+        mock_head.side_effect = httpx.ConnectError("unreachable")
+        
+        service = TranslationService()
+        await service.warmup()
+        
+        mock_head.assert_called_once()
+
+
+class TestTranslationHelpers:
+    """Tests for the synchronous translation helpers."""
+    
+    def test_plan_languages(self):
+        """Test the DeepL codes resolved for auto and explicit targets."""
+        service = TranslationService()
+        
+        assert service._plan_languages("es", None) == ("ES", "EN-US", "en")
+        assert service._plan_languages("en", None) == ("EN", "ES", "es")
+        assert service._plan_languages("en", "pt") == ("EN", "PT-BR", "pt")
 
 
 @pytest.mark.asyncio
@@ -109,5 +411,165 @@ class TestTextToSpeechService:
         )
         
         assert audio == b"fake_audio_data"
+    
+    @patch("httpx.AsyncClient.post")
+    async def test_generate_audio_cached(self, mock_post):
+        """Test repeated text and voice settings reuse the synthesized audio."""
+        mock_response = MagicMock()
+        mock_response.content = b"fake_audio_data"
+        mock_response.raise_for_status = MagicMock()
+        mock_post.return_value = mock_response
+        
+        service = TextToSpeechService()
+        first = await service.generate_audio("Hola mundo", emotion="happy", language_code="es")
+        second = await service.generate_audio("Hola mundo", emotion="happy", language_code="es")
+        await service.generate_audio("Hola mundo", emotion="sad", language_code="es")
+        
+        assert first == second == b"fake_audio_data"
+        assert mock_post.call_count == 2
+    
+    @patch("httpx.AsyncClient.post")
+    async def test_generate_audio_long_text_chunked(self, mock_post):
+        """Test long text is synthesized per chunk and joined in order."""
+        def respond(url, **kwargs):
+            response = MagicMock()
+            response.content = orjson.loads(kwargs["content"])["text"].encode()
+            response.raise_for_status = MagicMock()
+            return response
+        
+        mock_post.side_effect = respond
+        text = "Primera frase aquí. Segunda frase más larga. Tercera frase."
+        
+        service = TextToSpeechService()
+        with patch("app.modules.text_to_speech.service.settings.TTS_CHUNK_MAX_CHARS", 25):
+            audio = await service.generate_audio(text, language_code="es")
+        
+        assert mock_post.call_count == 3
+        assert audio == "Primera frase aquí.Segunda frase más larga.Tercera frase.".encode()
+    
+    @patch("httpx.AsyncClient.post")
+    async def test_generate_audio_stream_long_text(self, mock_post):
+        """Test long text streams its concurrently synthesized chunks in order."""
+        async def respond(url, **kwargs):
+            text = orjson.loads(kwargs["content"])["text"]
+            # Later chunks finish first; output order must not change
+            await asyncio.sleep(0.01 if text.startswith("Primera") else 0)
+            response = MagicMock()
+            response.content = text.encode()
+            response.raise_for_status = MagicMock()
+            return response
+        
+        mock_post.side_effect = respond
+        text = "Primera frase aquí. Segunda frase más larga. Tercera frase."
+        
+        service = TextToSpeechService()
+        with patch("app.modules.text_to_speech.service.settings.TTS_CHUNK_MAX_CHARS", 25):
+            streamed = [chunk async for chunk in service.generate_audio_stream(text, language_code="es")]
+        
+        assert mock_post.call_count == 3
+        assert streamed == [part.encode() for part in ("Primera frase aquí.", "Segunda frase más larga.", "Tercera frase.")]
+    
+    @patch("httpx.AsyncClient.stream")
+    async def test_generate_audio_stream(self, mock_stream):
+        """Test streamed audio is yielded in chunks and cached once complete."""
+        async def chunks(chunk_size):
+            for chunk in (b"fake_", b"audio_", b"data"):
+                yield chunk
+        
+        mock_response = MagicMock(is_error=False)
+        mock_response.raise_for_status = MagicMock()
+        mock_response.aiter_bytes = chunks
+        mock_stream.return_value.__aenter__.return_value = mock_response
+        
+        service = TextToSpeechService()
+        streamed = [chunk async for chunk in service.generate_audio_stream("Hola mundo", language_code="es")]
+        cached = [chunk async for chunk in service.generate_audio_stream("Hola mundo", language_code="es")]
+        
+        assert streamed == [b"fake_", b"audio_", b"data"]
+        assert cached == [b"fake_audio_data"]
+        assert mock_stream.call_count == 1
+        assert mock_stream.call_args.args[1].endswith("/stream")
+        assert mock_stream.call_args.kwargs["headers"]["Accept-Encoding"] == "identity"
+    
+    @patch("httpx.AsyncClient.post")
+    @patch("httpx.AsyncClient.stream")
+    async def test_generate_audio_stream_slow_consumer_frees_slot(self, mock_stream, mock_post):
+        """Test a stream the caller hasn't drained doesn't hold the concurrency slot."""
+        async def chunks(chunk_size):
+            for chunk in (b"fake_", b"audio_", b"data"):
+                yield chunk
+        
+        mock_response = MagicMock(is_error=False)
+        mock_response.aiter_bytes = chunks
+        mock_stream.return_value.__aenter__.return_value = mock_response
+        mock_post.return_value = MagicMock(is_error=False, content=b"other_audio")
+        
+        service = TextToSpeechService()
+        service._semaphore = asyncio.Semaphore(1)
+        stream = service.generate_audio_stream("Hola mundo", language_code="es")
+        first = await anext(stream)
+        
+        # The upstream read finished, so other synthesis isn't blocked
+        other = await asyncio.wait_for(service.generate_audio("Otra frase", language_code="es"), 1)
+        rest = [chunk async for chunk in stream]
+        
+        assert first == b"fake_"
+        assert other == b"other_audio"
+        assert rest == [b"audio_", b"data"]
+    
+    @patch("httpx.AsyncClient.stream")
+    @patch("httpx.AsyncClient.post")
+    async def test_retry_backoff_releases_slot(self, mock_post, mock_stream):
+        """Test the concurrency slot is free while a 429 backs off."""
+        request = httpx.Request("POST", "https://api.elevenlabs.io/v1/text-to-speech")
+        limited = httpx.Response(429, headers={"Retry-After": "1"}, request=request)
+        mock_post.side_effect = [limited, httpx.Response(200, content=b"fake_audio_data", request=request)]
+        
+        async def chunks(chunk_size):
+            yield b"streamed_audio"
+        
+        ok = MagicMock(is_error=False)
+        ok.aiter_bytes = chunks
+        streams = [MagicMock(), MagicMock()]
+        streams[0].__aenter__.return_value = limited
+        streams[1].__aenter__.return_value = ok
+        mock_stream.side_effect = streams
+        
+        service = TextToSpeechService()
+        service._semaphore = asyncio.Semaphore(1)
+        held_during_backoff = []
+        
+        async def sleep(delay):
+            held_during_backoff.append(service._semaphore.locked())
+        
+        with patch("asyncio.sleep", new=sleep):
+            audio = await service.generate_audio("Hola mundo", language_code="es")
+            streamed = [chunk async for chunk in service.generate_audio_stream("Otra frase", language_code="es")]
+        
+        assert audio == b"fake_audio_data"
+        assert streamed == [b"streamed_audio"]
+        assert held_during_backoff == [False, False]
+    
+    @patch("httpx.AsyncClient.head")
+    async def test_warmup_never_raises(self, mock_head):
+        """Test a failed preconnect is logged instead of raised."""
+        mock_head.side_effect = httpx.ConnectError("unreachable")
+        
+        service = TextToSpeechService()
+        await service.warmup()
+        
+        mock_head.assert_called_once()
 
 
+class TestTextToSpeechHelpers:
+    """Tests for the synchronous Text-to-Speech helpers."""
+    
+    def test_split_text_prefers_paragraphs(self):
+        """Test chunks break at paragraphs before sentences and stay in bounds."""
+        text = "One. Two. Three.\n\nFour five six. Seven."
+        
+        chunks = split_text(text, 24)
+        
+        assert chunks == ["One. Two. Three.", "Four five six. Seven."]
+        assert split_text("Short text.", 24) == ["Short text."]
+        assert all(len(chunk) <= 10 for chunk in split_text("x" * 25, 10))
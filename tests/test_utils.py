@@ -0,0 +1,37 @@
+"""
+Unit tests for core utility functions.
+"""
+from starlette.datastructures import Headers, UploadFile
+from app.core.utils import generate_content_key, sniff_audio_format, validate_audio_file
+
+
+def test_sniff_audio_format():
+    """Test container detection from magic bytes."""
+    assert sniff_audio_format(b"RIFF\x24\x00\x00\x00WAVEfmt ") == "wav"
+    assert sniff_audio_format(b"OggS\x00\x02") == "ogg"
+    assert sniff_audio_format(b"fLaC\x00\x00\x00\x22") == "flac"
+    assert sniff_audio_format(b"\x1aE\xdf\xa3\x9fB\x86\x81") == "webm"
+    assert sniff_audio_format(b"\x00\x00\x00\x20ftypM4A ") == "mp4"
+    assert sniff_audio_format(b"ID3\x04\x00") == "mp3"
+    assert sniff_audio_format(b"\xff\xfb\x90\x64") == "mp3"
+    assert sniff_audio_format(b"not audio") is None
+
+
+def test_generate_content_key_is_deterministic():
+    """Test identical audio maps to the same cache key."""
+    key = generate_content_key(b"audio")
+    
+    assert key == generate_content_key(b"audio")
+    assert key != generate_content_key(b"other")
+    assert key.startswith("cache/audio:")
+
+
+def test_validate_audio_file_resolves_mimetype():
+    """Test the MIME type comes from the extension, not the client header."""
+    upload = UploadFile(
+        file=None,
+        filename="clip.m4a",
+        headers=Headers({"content-type": "application/octet-stream"}),
+    )
+    
+    assert validate_audio_file(upload) == "audio/mp4"